@@ -1,15 +1,62 @@
-from flask import Flask, render_template, redirect, url_for, flash, session
+from flask import Flask, render_template, redirect, url_for, flash, session, jsonify
 from flask_login import LoginManager, login_required, current_user
-from models import db, User
-from config import Config
+from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db
+from config import get_config
+from utils.auth_utils import admin_required
+from utils.cache_utils import load_cached_user
+from utils.db_utils import build_engine_options, build_replica_binds, init_pool_metrics, get_pool_stats
+from utils.email_utils import init_mail
+from utils.schema_utils import MIGRATIONS_DIR, check_schema_version
 import os
+import sys
 
-def create_app():
+# `flask` commands that skip the boot-time schema check and background threads:
+# migrations must run on an out-of-date schema, and the workers run their own loops
+CLI_COMMANDS_WITHOUT_STARTUP = (('db',), ('outbox', 'worker'), ('study', 'worker'))
+
+def cli_command_path():
+    """The command words of the running `flask` invocation (e.g. ('db', 'upgrade')), or () outside the flask CLI"""
+    if os.environ.get('FLASK_RUN_FROM_CLI') != 'true':
+        return ()
+    
+    words = []
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg in ('--app', '-A', '--env-file', '-e'):
+            next(args, None)
+        elif not arg.startswith('-'):
+            words.append(arg)
+    return tuple(words)
+
+def skip_startup_tasks():
+    """True for the flask commands in CLI_COMMANDS_WITHOUT_STARTUP; serving (including `flask run`) runs them"""
+    path = cli_command_path()
+    return any(path[:len(command)] == command for command in CLI_COMMANDS_WITHOUT_STARTUP)
+
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class or get_config())
+    
+    # Behind a reverse proxy, take the client address from X-Forwarded-For (login throttling keys on it)
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    
+    # Pool and session settings for the configured database; explicit engine options win
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **build_engine_options(app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    app.config['SQLALCHEMY_BINDS'] = {
+        **build_replica_binds(app.config),
+        **app.config.get('SQLALCHEMY_BINDS', {})
+    }
     
     # Initialize extensions
     db.init_app(app)
+    init_mail(app)
+    Migrate(app, db, directory=MIGRATIONS_DIR)
     
     # Initialize Flask-Login
     login_manager = LoginManager()
@@ -20,7 +67,7 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_cached_user(int(user_id))
     
     # Register blueprints
     from routes.auth_routes import auth_bp
@@ -31,6 +78,17 @@ def create_app():
     app.register_blueprint(flashcard_bp, url_prefix='/flashcards')
     app.register_blueprint(suggestion_bp, url_prefix='/suggestions')
     
+    # Register CLI commands
+    from utils.qa_memo import qa_memo_cli
+    from utils.study_utils import study_cli, start_rollup_worker
+    from utils.outbox_utils import outbox_cli, start_outbox_worker
+    from utils.schema_utils import schema_cli
+    
+    app.cli.add_command(qa_memo_cli)
+    app.cli.add_command(study_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(schema_cli)
+    
     # Main routes
     @app.route('/')
     def index():
@@ -43,9 +101,24 @@ def create_app():
     def premium():
         return render_template('premium.html')
     
-    # Create tables
+    @app.route('/health/db')
+    @login_required
+    @admin_required
+    def db_health():
+        replicas = {key: get_pool_stats(engine) for key, engine in db.engines.items() if key}
+        return jsonify({'success': True, 'pool': get_pool_stats(db.engine), 'replicas': replicas})
+    
     with app.app_context():
-        db.create_all()
+        for engine in db.engines.values():
+            init_pool_metrics(engine)
+    
+    if not skip_startup_tasks():
+        # Schema changes are applied by `python migrate_db.py` / `flask db upgrade`, not on boot
+        check_schema_version(app)
+        
+        # Background workers: study stats rollups and the email outbox
+        start_rollup_worker(app)
+        start_outbox_worker(app)
     
     return app
 
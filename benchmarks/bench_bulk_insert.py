@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark flashcard persistence
+Compares saving generated cards one ORM object at a time (db.session.add per
+card, then commit) with bulk_insert_flashcards, which issues one statement
+per batch and returns the new ids.
+
+Usage: python benchmarks/bench_bulk_insert.py [--sizes 10,1000,100000]
+                                              [--database-url sqlite:////tmp/bulk.db]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+def make_cards(count):
+    """Generated-card dicts shaped like the output of generate_flashcards_from_text"""
+    return [{
+        'title': f'Study Card {n + 1}',
+        'question': f"What is the main concept related to 'term{n}' in this context?",
+        'answer': f'Term {n} is explained by a sentence of roughly the length a real answer would have.',
+        'difficulty': 'medium'
+    } for n in range(count)]
+
+def save_per_object(user_id, cards):
+    """The original save loop from the generate route"""
+    from models import db, Flashcard
+    
+    flashcards = []
+    for card_data in cards:
+        flashcard = Flashcard(
+            user_id=user_id,
+            title=card_data['title'],
+            question=card_data['question'],
+            answer=card_data['answer'],
+            difficulty=card_data.get('difficulty', 'medium')
+        )
+        db.session.add(flashcard)
+        flashcards.append(flashcard)
+    db.session.commit()
+    return [flashcard.id for flashcard in flashcards]
+
+def save_bulk(user_id, cards):
+    from models import db
+    from utils.bulk_utils import bulk_insert_flashcards
+    
+    ids = bulk_insert_flashcards(user_id, cards)
+    db.session.commit()
+    return ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,1000,100000')
+    parser.add_argument('--database-url', default=None, help='Defaults to a throwaway SQLite file')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='bench-bulk-')
+    Config.SQLALCHEMY_DATABASE_URI = args.database_url or f"sqlite:///{os.path.join(workdir, 'bulk.db')}"
+    Config.STUDY_ROLLUP_INTERVAL = 0
+    Config.OUTBOX_INPROCESS_WORKER = False
+    Config.SCHEMA_VERSION_CHECK = 'off'
+    
+    from app import create_app
+    from models import db, User
+    from utils.schema_utils import upgrade_schema
+    
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+        user = User(username=f'bench_{int(time.time())}', email=f'bench_{int(time.time())}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        
+        print(f"📄 Flashcard inserts ({db.engine.dialect.name})")
+        print("=" * 50)
+        
+        for size in (int(size) for size in args.sizes.split(',')):
+            cards = make_cards(size)
+            timings = {}
+            for name, func in (('per-object', save_per_object), ('bulk', save_bulk)):
+                start = time.perf_counter()
+                ids = func(user_id, cards)
+                timings[name] = time.perf_counter() - start
+                assert len(ids) == size and None not in ids
+                db.session.expunge_all()
+            
+            print(f"{size:>7} cards: per-object {timings['per-object'] * 1000:9.1f} ms"
+                  f"   bulk {timings['bulk'] * 1000:8.1f} ms"
+                  f"   ({timings['per-object'] / timings['bulk']:.1f}x)")
+
+if __name__ == "__main__":
+    main()
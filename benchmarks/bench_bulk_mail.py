@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk mailer against a local SMTP server
+Starts an aiosmtpd stand-in (optionally failing a share of messages with a
+transient 451), then sends confirmation emails with send_bulk_mail and with
+the original one-connection-per-message mail.send loop.
+
+Requires: pip install aiosmtpd
+
+Usage: python benchmarks/bench_bulk_mail.py [--recipients 2000] [--connections 4]
+                                            [--rate 0] [--fail-rate 0.02]
+"""
+
+import argparse
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+class CountingHandler:
+    """aiosmtpd handler that counts deliveries and randomly defers some"""
+    
+    def __init__(self, fail_rate):
+        self.fail_rate = fail_rate
+        self.delivered = 0
+        self.deferred = 0
+        self.lock = threading.Lock()
+    
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            if random.random() < self.fail_rate:
+                self.deferred += 1
+                return '451 Try again later'
+            self.delivered += 1
+        return '250 Message accepted for delivery'
+
+def legacy_send(recipients):
+    """The original loop: mail.send opens a new SMTP connection per message"""
+    from utils.email_utils import mail, build_message
+    
+    sent = 0
+    for recipient in recipients:
+        try:
+            mail.send(build_message(recipient))
+            sent += 1
+        except Exception:
+            continue
+    return sent
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=2000)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0, help='Sends per second (0 = unlimited)')
+    parser.add_argument('--fail-rate', type=float, default=0.02, help='Share of messages deferred with a 451')
+    parser.add_argument('--legacy-max', type=int, default=2000, help='Skip the per-message comparison above this count')
+    args = parser.parse_args()
+    
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        sys.exit("aiosmtpd is required: pip install aiosmtpd")
+    
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    
+    handler = CountingHandler(args.fail_rate)
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    Config.STUDY_ROLLUP_INTERVAL = 0
+    Config.OUTBOX_INPROCESS_WORKER = False
+    Config.SCHEMA_VERSION_CHECK = 'off'
+    Config.MAIL_SERVER = '127.0.0.1'
+    Config.MAIL_PORT = port
+    Config.MAIL_USE_TLS = False
+    Config.MAIL_USERNAME = Config.MAIL_PASSWORD = None
+    Config.MAIL_RETRY_BACKOFF = 0.05
+    
+    from app import create_app
+    from utils.email_utils import send_bulk_mail, build_message, summarize_mail_results
+    
+    app = create_app()
+    recipients = [
+        {'kind': 'suggestion_confirmation', 'user_id': n, 'email': f'student{n}@example.com', 'username': f'student{n}'}
+        for n in range(args.recipients)
+    ]
+    
+    print(f"📄 Bulk mail: {args.recipients} recipients, {args.connections} connections, "
+          f"{args.fail_rate:.0%} transient failures")
+    print("=" * 50)
+    
+    try:
+        with app.app_context():
+            start = time.perf_counter()
+            results = send_bulk_mail(app, recipients, build_message,
+                                     connections=args.connections, rate=args.rate)
+            elapsed = time.perf_counter() - start
+            summary = summarize_mail_results(results)
+            retried = sum(1 for result in results if result['attempts'] > 1)
+            print(f"{'bulk mailer':>14}: {elapsed:7.2f} s  {args.recipients / elapsed:8.1f} msg/s  "
+                  f"sent {summary['sent']}, failed {summary['failed']}, retried {retried}")
+            
+            if args.recipients <= args.legacy_max:
+                start = time.perf_counter()
+                sent = legacy_send(recipients)
+                elapsed = time.perf_counter() - start
+                print(f"{'per-message':>14}: {elapsed:7.2f} s  {args.recipients / elapsed:8.1f} msg/s  "
+                      f"sent {sent}, failed {args.recipients - sent}")
+    finally:
+        controller.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark the spaced-repetition due queue
+Times fetching the next due cards through the (user_id, due_at, id) index as a
+user's deck grows, next to the old approach of loading every card and sorting
+in Python.
+
+Usage: python benchmarks/bench_due_queue.py [--sizes 100,10000,100000,1000000] [--repeat 20]
+                                            [--database-url sqlite:////tmp/due.db]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+def legacy_next_cards(user_id, limit):
+    """Fetch the whole deck and pick the soonest due cards in Python"""
+    from models import Flashcard
+    
+    cards = Flashcard.query.filter_by(user_id=user_id).all()
+    return sorted(cards, key=lambda card: (card.due_at, card.id))[:limit]
+
+def grow_deck(user_id, current, target, batch_size=10000):
+    """Bulk insert cards with scattered due dates until the user has `target` cards"""
+    from models import db, Flashcard
+    
+    now = datetime.utcnow()
+    table = Flashcard.__table__
+    for start in range(current, target, batch_size):
+        rows = [{
+            'user_id': user_id,
+            'title': f'Card {n}',
+            'question': f'Question {n}?',
+            'answer': f'Answer {n}',
+            'difficulty': 'medium',
+            'times_studied': 0,
+            'correct_answers': 0,
+            'ease_factor': 2.5,
+            'interval_days': 0,
+            'repetitions': 0,
+            'due_at': now + timedelta(minutes=random.randint(-30 * 24 * 60, 30 * 24 * 60)),
+            'created_at': now
+        } for n in range(start, min(start + batch_size, target))]
+        db.session.execute(table.insert(), rows)
+        db.session.commit()
+
+def time_call(func, repeat):
+    """Median wall time of func() over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--legacy-max', type=int, default=100000, help='Skip the full-fetch comparison above this deck size')
+    parser.add_argument('--database-url', default=None, help='Defaults to a throwaway SQLite file')
+    args = parser.parse_args()
+    
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    workdir = tempfile.mkdtemp(prefix='bench-due-')
+    Config.SQLALCHEMY_DATABASE_URI = args.database_url or f"sqlite:///{os.path.join(workdir, 'due.db')}"
+    Config.STUDY_ROLLUP_INTERVAL = 0
+    Config.OUTBOX_INPROCESS_WORKER = False
+    Config.SCHEMA_VERSION_CHECK = 'off'
+    
+    from app import create_app
+    from models import db, User
+    from utils.schema_utils import upgrade_schema
+    from utils.srs_utils import get_due_cards
+    
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+        user = User(username=f'bench_{int(time.time())}', email=f'bench_{int(time.time())}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        
+        print(f"📄 Due queue: next {args.limit} cards, median of {args.repeat} runs")
+        print("=" * 50)
+        
+        current = 0
+        for size in sizes:
+            grow_deck(user.id, current, size)
+            current = size
+            
+            indexed = time_call(lambda: get_due_cards(user.id, limit=args.limit), args.repeat)
+            line = f"{size:>9} cards: indexed {indexed * 1000:8.2f} ms"
+            if size <= args.legacy_max:
+                legacy = time_call(lambda: legacy_next_cards(user.id, args.limit), max(1, args.repeat // 10))
+                line += f"   full fetch {legacy * 1000:10.2f} ms"
+            print(line)
+            db.session.remove()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark email body rendering
+Compares the original per-recipient f-string, rendering the Jinja templates
+for every recipient, and the compiled batch renderer (render_emails) that
+renders each template once and only substitutes the per-recipient fields.
+
+Usage: python benchmarks/bench_email_render.py [--recipients 10000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.email_utils import _email_env, render_emails, EMAIL_TEMPLATES
+
+def legacy_confirmation_html(username):
+    """The original f-string body from send_with_flask_mail, kept here for comparison"""
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+            .header {{ background: linear-gradient(135deg, #3B82F6, #8B5CF6); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
+            .content {{ background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; }}
+            .footer {{ text-align: center; margin-top: 20px; color: #666; font-size: 14px; }}
+            .btn {{ display: inline-block; background: #3B82F6; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; margin: 10px 0; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>🧠 AI Study Buddy</h1>
+                <p>Thank you for your valuable feedback!</p>
+            </div>
+            <div class="content">
+                <h2>Hello {username}!</h2>
+                <p>We've received your suggestion and really appreciate your feedback. Your input helps us improve AI Study Buddy for students across Africa.</p>
+                
+                <p><strong>What happens next?</strong></p>
+                <ul>
+                    <li>Our team will review your suggestion carefully</li>
+                    <li>We'll consider implementing it in future updates</li>
+                    <li>You'll be notified of any major feature releases</li>
+                </ul>
+                
+                <p>Keep studying smart with AI Study Buddy! 📚</p>
+                
+                <a href="#" class="btn">Continue Studying</a>
+            </div>
+            <div class="footer">
+                <p>AI Study Buddy - Empowering African Students with AI Technology</p>
+                <p>SDG 4: Quality Education | Vibe Coding 3.0 Hackathon</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+def legacy_render(recipients):
+    return [legacy_confirmation_html(recipient['username']) for recipient in recipients]
+
+def jinja_render(recipients):
+    """Full Jinja render of both bodies for every recipient"""
+    subject = EMAIL_TEMPLATES['suggestion_confirmation']['subject']
+    html = _email_env.get_template('suggestion_confirmation.html')
+    text = _email_env.get_template('suggestion_confirmation.txt')
+    return [
+        (subject, html.render(subject=subject, username=recipient['username']), text.render(username=recipient['username']))
+        for recipient in recipients
+    ]
+
+def compiled_render(recipients):
+    return render_emails('suggestion_confirmation', recipients)
+
+def time_call(func, recipients, repeat):
+    """Best wall time of func(recipients) over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(recipients)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    recipients = [{'username': f'student{n}', 'email': f'student{n}@example.com'} for n in range(args.recipients)]
+    compiled_render(recipients[:1])   # compile outside the timed runs
+    
+    print(f"📄 Email rendering: {args.recipients} recipients, best of {args.repeat}")
+    print("=" * 50)
+    
+    for name, func in (('f-string (html only)', legacy_render), ('jinja per recipient', jinja_render), ('compiled batch', compiled_render)):
+        seconds = time_call(func, recipients, args.repeat)
+        print(f"{name:>22}: {seconds * 1000:8.1f} ms  {args.recipients / seconds:10.0f} msg/s")
+
+if __name__ == "__main__":
+    main()
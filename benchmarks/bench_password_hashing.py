@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification under a login burst
+Fires a burst of concurrent verifications at each hashing pool backend and
+reports how many were served or shed, their latency, and how responsive a
+cheap concurrent request stays while the burst is running.
+
+Usage: python benchmarks/bench_password_hashing.py [--clients 32] [--attempts 4] [--queue-limit 8]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+from utils.auth_utils import HASH_POOL_BACKENDS, HashingOverloaded
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_burst(pool, password_hash, clients, attempts):
+    """Verify from `clients` threads at once while timing a cheap request loop"""
+    latencies = []
+    shed = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+    pings = []
+    
+    def client():
+        for _ in range(attempts):
+            start = time.perf_counter()
+            try:
+                pool.run(check_password_hash, password_hash, 'correct horse')
+            except HashingOverloaded:
+                with lock:
+                    shed[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+    
+    def ping():
+        while not done.is_set():
+            start = time.perf_counter()
+            sum(range(1000))
+            pings.append(time.perf_counter() - start)
+            time.sleep(0.005)
+    
+    pinger = threading.Thread(target=ping)
+    pinger.start()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    pinger.join()
+    
+    return elapsed, latencies, shed[0], pings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=4, help='Verifications per client')
+    parser.add_argument('--queue-limit', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=Config.PASSWORD_HASH_WORKERS)
+    parser.add_argument('--method', default=Config.PASSWORD_HASH_METHOD or 'scrypt')
+    args = parser.parse_args()
+    
+    password_hash = generate_password_hash('correct horse', args.method)
+    
+    print(f"📄 Password hashing: {args.clients} clients x {args.attempts} attempts, "
+          f"{args.method}, {args.workers} workers, queue limit {args.queue_limit}")
+    print("=" * 50)
+    
+    for name in ('inline', 'process'):
+        pool = HASH_POOL_BACKENDS[name](args.workers, args.queue_limit)
+        pool.run(check_password_hash, password_hash, 'warm up')
+        
+        elapsed, latencies, shed, pings = run_burst(pool, password_hash, args.clients, args.attempts)
+        pool.shutdown()
+        
+        print(f"{name:>8}: {len(latencies):4d} served  {shed:4d} shed  in {elapsed:6.2f}s  "
+              f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  "
+              f"ping p95 {percentile(pings, 0.95) * 1000:6.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Exercise read-replica routing against two local databases
+Seeds a primary SQLite database, copies it to stand in for a replica, and
+counts the statements each engine serves for the @read_replica views, for a
+write followed by an immediate read (which must stay on the primary), and for
+reads once the sticky window has passed. Pass two MySQL URLs to run it
+against real servers instead.
+
+Usage: python benchmarks/bench_replica_routing.py [--cards 500] [--requests 20] [--primary-url URL --replica-url URL]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from config import Config
+
+READ_VIEWS = ('/flashcards/library', '/flashcards/api/cards', '/flashcards/api/due', '/flashcards/api/stats', '/suggestions/')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=20, help='Requests per read view')
+    parser.add_argument('--primary-url', default=None)
+    parser.add_argument('--replica-url', default=None, help='Must already hold a copy of the primary schema and data')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='replica-bench-')
+    primary_url = args.primary_url or f"sqlite:///{os.path.join(workdir, 'primary.db')}"
+    Config.SQLALCHEMY_DATABASE_URI = primary_url
+    Config.OUTBOX_INPROCESS_WORKER = False
+    Config.STUDY_ROLLUP_INTERVAL = 0
+    Config.MAIL_ENABLED = False
+    Config.DB_REPLICA_STICKY_SECONDS = 1
+    Config.SCHEMA_VERSION_CHECK = 'off'
+    
+    from app import create_app
+    from models import db, User, Flashcard
+    from utils.bulk_utils import bulk_insert_flashcards
+    from utils.schema_utils import upgrade_schema
+    
+    # Seed the primary on its own, then clone it as the replica
+    seed_app = create_app()
+    with seed_app.app_context():
+        upgrade_schema()
+        user = User(username='replica-bench', email='replica-bench@example.com')
+        user.set_password('replica-bench-password')
+        db.session.add(user)
+        db.session.commit()
+        bulk_insert_flashcards(user.id, [
+            {'title': f'Card {n}', 'question': f'Question {n}?', 'answer': f'Answer {n}'}
+            for n in range(args.cards)
+        ])
+        db.session.commit()
+        card_id = db.session.query(db.func.min(Flashcard.id)).scalar()
+        db.engine.dispose()
+    
+    if args.replica_url:
+        replica_url = args.replica_url
+    else:
+        shutil.copy(os.path.join(workdir, 'primary.db'), os.path.join(workdir, 'replica.db'))
+        replica_url = f"sqlite:///{os.path.join(workdir, 'replica.db')}"
+    Config.SQLALCHEMY_REPLICA_URIS = [replica_url]
+    
+    app = create_app()
+    counts = Counter()
+    with app.app_context():
+        for key, engine in db.engines.items():
+            name = key or 'primary'
+            event.listen(engine, 'before_cursor_execute', lambda *a, name=name: counts.update([name]))
+    
+    client = app.test_client()
+    client.post('/auth/login', json={'email': 'replica-bench@example.com', 'password': 'replica-bench-password'})
+    
+    print(f"📄 Replica routing: {args.cards} cards, {args.requests} requests per read view")
+    print("=" * 50)
+    
+    def phase(label, func):
+        counts.clear()
+        start = time.perf_counter()
+        statuses = func()
+        elapsed = time.perf_counter() - start
+        served = ', '.join(f"{name} {count}" for name, count in sorted(counts.items())) or 'no queries'
+        print(f"{label:>24}: {served}  statuses {dict(Counter(statuses))}  in {elapsed * 1000:.0f} ms")
+    
+    phase('read views', lambda: [
+        client.get(path).status_code for _ in range(args.requests) for path in READ_VIEWS
+    ])
+    phase('write', lambda: [client.post('/flashcards/study_events', json={
+        'events': [{'flashcard_id': card_id, 'is_correct': True, 'time_spent_ms': 1200}]
+    }).status_code])
+    phase('read right after write', lambda: [client.get(path).status_code for path in READ_VIEWS])
+    time.sleep(Config.DB_REPLICA_STICKY_SECONDS + 0.1)
+    phase('read after sticky window', lambda: [client.get(path).status_code for path in READ_VIEWS])
+    
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
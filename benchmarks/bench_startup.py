@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark application startup
+Compares create_app() as it boots now (a single schema-version query)
+with the schema work every boot used to do (db.create_all() against an
+already migrated database), timing each boot and counting its SQL
+statements. On MySQL every statement is a round trip, so pass
+--database-url to see the difference there.
+
+Usage: python benchmarks/bench_startup.py [--boots 20] [--database-url URL]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from config import Config
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--boots', type=int, default=20)
+    parser.add_argument('--database-url', default=None, help='An already migrated database (defaults to a throwaway SQLite file)')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    Config.SQLALCHEMY_DATABASE_URI = args.database_url or f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+    Config.STUDY_ROLLUP_INTERVAL = 0
+    Config.OUTBOX_INPROCESS_WORKER = False
+    
+    from app import create_app
+    from models import db
+    from utils.schema_utils import upgrade_schema
+    
+    if not args.database_url:
+        check, Config.SCHEMA_VERSION_CHECK = Config.SCHEMA_VERSION_CHECK, 'off'
+        app = create_app()
+        with app.app_context():
+            upgrade_schema()
+            db.engine.dispose()
+        Config.SCHEMA_VERSION_CHECK = check
+    
+    statements = [0]
+    
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+    
+    def boot_with_create_all():
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+        return app
+    
+    print(f"📄 Startup: {args.boots} boots against {make_url(Config.SQLALCHEMY_DATABASE_URI).get_backend_name()}")
+    print("=" * 50)
+    
+    for name, boot in (('create_all on boot', boot_with_create_all), ('version check', create_app)):
+        timings = []
+        statements[0] = 0
+        for _ in range(args.boots):
+            start = time.perf_counter()
+            app = boot()
+            timings.append(time.perf_counter() - start)
+            with app.app_context():
+                db.engine.dispose()
+        print(f"{name:>20}: median {statistics.median(timings) * 1000:7.1f} ms  "
+              f"max {max(timings) * 1000:7.1f} ms  {statements[0] / args.boots:5.1f} statements per boot")
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,25 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool and session settings (applied to MySQL only, see utils/db_utils.py)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 10)
+    # Keep below the server's wait_timeout so idle connections are replaced before MySQL drops them
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 280)
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT') or 10)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS') or 0)
+    DB_WAIT_TIMEOUT = int(os.environ.get('DB_WAIT_TIMEOUT') or 0)
+    DB_ISOLATION_LEVEL = os.environ.get('DB_ISOLATION_LEVEL')
+    
+    # Read replicas for @read_replica views (comma separated URIs); empty means everything uses the primary
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if uri.strip()]
+    DB_REPLICA_STICKY_SECONDS = float(os.environ.get('DB_REPLICA_STICKY_SECONDS') or 5)
+    
+    # Boot-time check that the database is at the newest migration: 'warn', 'fail' or 'off'
+    SCHEMA_VERSION_CHECK = os.environ.get('SCHEMA_VERSION_CHECK') or 'warn'
+    
     # Email Configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -24,12 +43,155 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'noreply@aistudybuddy.com'
+    # Send through SMTP when credentials are set, or when forced (e.g. a local test server)
+    MAIL_ENABLED = os.environ.get('MAIL_ENABLED', '').lower() in ['true', 'on', '1'] or bool(MAIL_USERNAME and MAIL_PASSWORD)
+    
+    # Bulk mail: persistent connections, messages per connection, sends per second (0 = unlimited)
+    MAIL_BULK_CONNECTIONS = int(os.environ.get('MAIL_BULK_CONNECTIONS') or 4)
+    MAIL_MAX_EMAILS = int(os.environ.get('MAIL_MAX_EMAILS') or 100)
+    MAIL_RATE_LIMIT = float(os.environ.get('MAIL_RATE_LIMIT') or 10)
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES') or 3)
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF') or 1.0)
+    
+    # Email outbox, delivered by `flask outbox worker` (or in each web process with OUTBOX_INPROCESS_WORKER=true)
+    OUTBOX_INPROCESS_WORKER = os.environ.get('OUTBOX_INPROCESS_WORKER', '').lower() in ['true', 'on', '1']
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE') or 100)
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL') or 5)
+    OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS') or 300)
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS') or 5)
+    OUTBOX_RETRY_BACKOFF = float(os.environ.get('OUTBOX_RETRY_BACKOFF') or 60)
+    SUGGESTION_CONFIRMATION_BATCH_SIZE = int(os.environ.get('SUGGESTION_CONFIRMATION_BATCH_SIZE') or 1000)
+    
+    # Flashcard generation backend ('auto', 'huggingface', 'local' or 'mock')
+    FLASHCARD_BACKEND = os.environ.get('FLASHCARD_BACKEND') or 'auto'
+    OFFLINE_CARD_COUNT = int(os.environ.get('OFFLINE_CARD_COUNT') or 5)
     
     # Hugging Face API Configuration
     HUGGINGFACE_API_KEY = os.environ.get('HUGGINGFACE_API_KEY')
     HUGGINGFACE_API_URL = 'https://api-inference.huggingface.co/models/deepset/roberta-base-squad2'
+    HUGGINGFACE_MAX_WORKERS = int(os.environ.get('HUGGINGFACE_MAX_WORKERS') or 10)
+    HUGGINGFACE_REQUEST_TIMEOUT = float(os.environ.get('HUGGINGFACE_REQUEST_TIMEOUT') or 10)
+    FLASHCARD_GENERATION_DEADLINE = float(os.environ.get('FLASHCARD_GENERATION_DEADLINE') or 15)
+    
+    # Study material ingestion
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_BYTES') or 20 * 1024 * 1024)
+    CHUNK_MAX_LENGTH = int(os.environ.get('CHUNK_MAX_LENGTH') or 500)
+    CHUNK_OVERLAP_SENTENCES = int(os.environ.get('CHUNK_OVERLAP_SENTENCES') or 1)
+    FLASHCARD_CHUNK_BUDGET = int(os.environ.get('FLASHCARD_CHUNK_BUDGET') or 5)
+    
+    # Generated flashcard cache ('memory', 'sql' or 'none')
+    FLASHCARD_CACHE_BACKEND = os.environ.get('FLASHCARD_CACHE_BACKEND') or 'memory'
+    FLASHCARD_CACHE_TTL = int(os.environ.get('FLASHCARD_CACHE_TTL') or 7 * 24 * 3600)
+    FLASHCARD_CACHE_MAX_ENTRIES = int(os.environ.get('FLASHCARD_CACHE_MAX_ENTRIES') or 1000)
+    FLASHCARD_CACHE_MAX_BYTES = int(os.environ.get('FLASHCARD_CACHE_MAX_BYTES') or 32 * 1024 * 1024)
+    
+    # Logged-in user cache: memory (per worker), redis (shared) or none.
+    # ORM changes invalidate it; edits made outside the app show up after USER_CACHE_TTL.
+    USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND') or 'memory'
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 300)
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES') or 10000)
+    USER_CACHE_REDIS_URL = os.environ.get('USER_CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    
+    # Per (question, chunk, model) QA answer memo
+    QA_MEMO_ENABLED = os.environ.get('QA_MEMO_ENABLED', 'true').lower() in ['true', 'on', '1']
+    QA_MEMO_MAX_BYTES = int(os.environ.get('QA_MEMO_MAX_BYTES') or 64 * 1024 * 1024)
+    
+    # Background flashcard generation jobs ('thread' or 'inline')
+    JOB_QUEUE_BACKEND = os.environ.get('JOB_QUEUE_BACKEND') or 'thread'
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS') or 4)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 0.5)
+    # How long /jobs/<id>/events holds a worker before the client falls back to polling
+    JOB_STREAM_TIMEOUT = float(os.environ.get('JOB_STREAM_TIMEOUT') or 15)
+    STREAM_SAVE_BATCH_SIZE = int(os.environ.get('STREAM_SAVE_BATCH_SIZE') or 5)
+    
+    # Flashcard library pagination
+    LIBRARY_PAGE_SIZE = int(os.environ.get('LIBRARY_PAGE_SIZE') or 24)
+    LIBRARY_MAX_PAGE_SIZE = int(os.environ.get('LIBRARY_MAX_PAGE_SIZE') or 100)
+    
+    # Bulk import/export (rows per statement or streamed chunk)
+    BULK_INSERT_BATCH_SIZE = int(os.environ.get('BULK_INSERT_BATCH_SIZE') or 1000)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE') or 500)
+    
+    # Batched study event ingestion
+    STUDY_EVENTS_MAX_BATCH = int(os.environ.get('STUDY_EVENTS_MAX_BATCH') or 500)
+    
+    # Study stats rollups every STUDY_ROLLUP_INTERVAL seconds, run by `flask study worker`
+    # (or in each web process with STUDY_ROLLUP_INPROCESS_WORKER=true)
+    STUDY_ROLLUP_INPROCESS_WORKER = os.environ.get('STUDY_ROLLUP_INPROCESS_WORKER', '').lower() in ['true', 'on', '1']
+    STUDY_ROLLUP_INTERVAL = float(os.environ.get('STUDY_ROLLUP_INTERVAL') or 60)
+    STUDY_ROLLUP_BATCH_SIZE = int(os.environ.get('STUDY_ROLLUP_BATCH_SIZE') or 5000)
+    STUDY_ROLLUP_LAG = float(os.environ.get('STUDY_ROLLUP_LAG') or 5)
+    STUDY_STATS_MAX_DAYS = int(os.environ.get('STUDY_STATS_MAX_DAYS') or 365)
+    
+    # Spaced repetition scheduling
+    SRS_INITIAL_EASE = float(os.environ.get('SRS_INITIAL_EASE') or 2.5)
+    SRS_MAX_INTERVAL_DAYS = int(os.environ.get('SRS_MAX_INTERVAL_DAYS') or 365)
+    STUDY_RELEARN_MINUTES = int(os.environ.get('STUDY_RELEARN_MINUTES') or 10)
+    
+    # Password hashing (werkzeug method string, e.g. scrypt:32768:8:1). Unset keeps werkzeug's
+    # default; once set, existing hashes made with other parameters are upgraded at login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD')
+    PASSWORD_HASH_POOL = os.environ.get('PASSWORD_HASH_POOL') or 'process'
+    # Hashing processes per app process (so per gunicorn worker)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT') or 16)
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)
+    
+    # Login throttling (attempts per LOGIN_THROTTLE_WINDOW seconds; 0 disables). With the default
+    # 'memory' backend the counts are per process: under gunicorn with N workers a client gets up
+    # to N x the limit, and a worker restart forgets them. 'redis' shares them across workers.
+    LOGIN_THROTTLE_BACKEND = os.environ.get('LOGIN_THROTTLE_BACKEND') or 'memory'
+    LOGIN_THROTTLE_REDIS_URL = os.environ.get('LOGIN_THROTTLE_REDIS_URL') or os.environ.get('REDIS_URL')
+    LOGIN_IP_LIMIT = int(os.environ.get('LOGIN_IP_LIMIT') or 30)
+    LOGIN_EMAIL_LIMIT = int(os.environ.get('LOGIN_EMAIL_LIMIT') or 5)
+    LOGIN_THROTTLE_WINDOW = int(os.environ.get('LOGIN_THROTTLE_WINDOW') or 300)
+    LOGIN_THROTTLE_MAX_KEYS = int(os.environ.get('LOGIN_THROTTLE_MAX_KEYS') or 100000)
+    # Accounts allowed to see operational endpoints such as /health/db (comma separated emails)
+    ADMIN_EMAILS = [email.strip().lower() for email in (os.environ.get('ADMIN_EMAILS') or '').split(',') if email.strip()]
+    # Number of reverse proxies in front of the app whose X-Forwarded-For is trusted (0 = none)
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR') or 0)
     
     # IntaSend Configuration
     INTASEND_PUBLISHABLE_KEY = os.environ.get('INTASEND_PUBLISHABLE_KEY')
     INTASEND_SECRET_KEY = os.environ.get('INTASEND_SECRET_KEY')
-    INTASEND_TEST_MODE = os.environ.get('INTASEND_TEST_MODE', 'true').lower() in ['true', 'on', '1']
\ No newline at end of file
+    INTASEND_TEST_MODE = os.environ.get('INTASEND_TEST_MODE', 'true').lower() in ['true', 'on', '1']
+
+class DevelopmentConfig(Config):
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 2)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 3)
+
+class ProductionConfig(Config):
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS') or 30000)
+    DB_ISOLATION_LEVEL = os.environ.get('DB_ISOLATION_LEVEL') or 'READ COMMITTED'
+    SCHEMA_VERSION_CHECK = os.environ.get('SCHEMA_VERSION_CHECK') or 'fail'
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
+    MAIL_ENABLED = False
+    OUTBOX_INPROCESS_WORKER = False
+    STUDY_ROLLUP_INTERVAL = 0
+    SCHEMA_VERSION_CHECK = 'off'
+
+# Selected with APP_ENV
+CONFIG_PROFILES = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+}
+
+def get_config(name=None):
+    """
+    Return the config class for a profile name, defaulting to APP_ENV
+    
+    Without a profile the base Config is used, so deployments that never set
+    APP_ENV keep the default pool sizes and timeouts.
+    """
+    name = name or os.environ.get('APP_ENV')
+    if not name:
+        return Config
+    if name not in CONFIG_PROFILES:
+        raise ValueError(f"Unknown APP_ENV profile: {name}")
+    return CONFIG_PROFILES[name]
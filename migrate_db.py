@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """
 Database Migration Script for AI Study Buddy
-Run this script to set up the MySQL database and create all required tables.
+Run this script to set up the MySQL database and bring its schema up to date.
+The app no longer creates tables on startup; run this (or `flask db upgrade`)
+on every deploy before starting workers.
 """
 
 import pymysql
@@ -17,6 +19,9 @@ MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
 MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', '')
 MYSQL_DB = os.environ.get('MYSQL_DB', 'ai_study_buddy')
 
+# The migration create_tables() is equivalent to; later schema changes live in migrations/
+LEGACY_SCHEMA_REVISION = '0003'
+
 def create_database():
     """Create the database if it doesn't exist"""
     try:
@@ -40,8 +45,51 @@ def create_database():
         print(f"❌ Error creating database: {e}")
         return False
 
+def add_column_if_missing(cursor, table, column, definition):
+    """Add a column to a table created by an older version of this script"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (MYSQL_DB, table, column))
+    
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+        print(f"✅ Added {table}.{column}")
+        return True
+    return False
+
+def add_index_if_missing(cursor, table, index, columns, kind='INDEX'):
+    """Add an index to a table created by an older version of this script"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (MYSQL_DB, table, index))
+    
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"ALTER TABLE {table} ADD {kind} {index} {columns}")
+        print(f"✅ Added index {table}.{index}")
+
+def schema_is_versioned():
+    """True once the database has an alembic_version table, i.e. migrations manage its schema"""
+    connection = pymysql.connect(
+        host=MYSQL_HOST,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        database=MYSQL_DB,
+        charset='utf8mb4'
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'alembic_version'
+            """, (MYSQL_DB,))
+            return cursor.fetchone()[0] > 0
+    finally:
+        connection.close()
+
 def create_tables():
-    """Create all required tables"""
+    """Create all required tables (the schema as of LEGACY_SCHEMA_REVISION)"""
     try:
         # Connect to the specific database
         connection = pymysql.connect(
@@ -68,6 +116,23 @@ def create_tables():
             """)
             print("✅ Users table created")
             
+            # Flashcard generation jobs table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS generation_jobs (
+                    id CHAR(32) PRIMARY KEY,
+                    user_id INT NOT NULL,
+                    status ENUM('queued', 'running', 'done', 'failed') DEFAULT 'queued',
+                    card_count INT DEFAULT 0,
+                    error VARCHAR(255),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP NULL,
+                    finished_at TIMESTAMP NULL,
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                    INDEX idx_user_id (user_id)
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            print("✅ Generation jobs table created")
+            
             # Flashcards table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS flashcards (
@@ -79,12 +144,40 @@ def create_tables():
                     difficulty ENUM('easy', 'medium', 'hard') DEFAULT 'medium',
                     times_studied INT DEFAULT 0,
                     correct_answers INT DEFAULT 0,
+                    job_id CHAR(32) NULL,
+                    ease_factor FLOAT NOT NULL DEFAULT 2.5,
+                    interval_days INT NOT NULL DEFAULT 0,
+                    repetitions INT NOT NULL DEFAULT 0,
+                    due_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    last_reviewed_at TIMESTAMP NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                    FOREIGN KEY (job_id) REFERENCES generation_jobs(id) ON DELETE SET NULL,
                     INDEX idx_user_id (user_id),
-                    INDEX idx_created_at (created_at)
+                    INDEX idx_job_id (job_id),
+                    INDEX idx_created_at (created_at),
+                    INDEX idx_user_created_id (user_id, created_at, id),
+                    INDEX idx_user_due_id (user_id, due_at, id),
+                    FULLTEXT INDEX ft_flashcards_text (title, question, answer)
                 ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
             """)
+            add_column_if_missing(cursor, 'flashcards', 'job_id', """
+                job_id CHAR(32) NULL,
+                ADD INDEX idx_job_id (job_id),
+                ADD FOREIGN KEY (job_id) REFERENCES generation_jobs(id) ON DELETE SET NULL
+            """)
+            add_index_if_missing(cursor, 'flashcards', 'idx_user_created_id', '(user_id, created_at, id)')
+            add_index_if_missing(cursor, 'flashcards', 'ft_flashcards_text', '(title, question, answer)', kind='FULLTEXT INDEX')
+            if add_column_if_missing(cursor, 'flashcards', 'due_at', """
+                ease_factor FLOAT NOT NULL DEFAULT 2.5,
+                ADD COLUMN interval_days INT NOT NULL DEFAULT 0,
+                ADD COLUMN repetitions INT NOT NULL DEFAULT 0,
+                ADD COLUMN due_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                ADD COLUMN last_reviewed_at TIMESTAMP NULL
+            """):
+                # Existing cards become due in the order they were created
+                cursor.execute("UPDATE flashcards SET due_at = created_at WHERE created_at IS NOT NULL")
+            add_index_if_missing(cursor, 'flashcards', 'idx_user_due_id', '(user_id, due_at, id)')
             print("✅ Flashcards table created")
             
             # Suggestions table
@@ -96,10 +189,12 @@ def create_tables():
                     email_sent BOOLEAN DEFAULT FALSE,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    INDEX idx_user_id (user_id),
-                    INDEX idx_email_sent (email_sent)
+                    INDEX idx_suggestions_user_created (user_id, created_at),
+                    INDEX idx_suggestions_email_sent_user (email_sent, user_id)
                 ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
             """)
+            add_index_if_missing(cursor, 'suggestions', 'idx_suggestions_user_created', '(user_id, created_at)')
+            add_index_if_missing(cursor, 'suggestions', 'idx_suggestions_email_sent_user', '(email_sent, user_id)')
             print("✅ Suggestions table created")
             
             # Payments table
@@ -138,6 +233,95 @@ def create_tables():
                 ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
             """)
             print("✅ Study sessions table created")
+            
+            # Daily study rollups (built from study_sessions by `flask study rollup`)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS card_daily_stats (
+                    flashcard_id INT NOT NULL,
+                    day DATE NOT NULL,
+                    user_id INT NOT NULL,
+                    attempts INT NOT NULL DEFAULT 0,
+                    correct INT NOT NULL DEFAULT 0,
+                    time_spent BIGINT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (flashcard_id, day),
+                    FOREIGN KEY (flashcard_id) REFERENCES flashcards(id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                    INDEX idx_card_stats_user_day (user_id, day)
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_daily_stats (
+                    user_id INT NOT NULL,
+                    day DATE NOT NULL,
+                    attempts INT NOT NULL DEFAULT 0,
+                    correct INT NOT NULL DEFAULT 0,
+                    time_spent BIGINT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, day),
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS rollup_state (
+                    name VARCHAR(50) PRIMARY KEY,
+                    last_event_id INT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            print("✅ Study stats rollup tables created")
+            
+            # Generated flashcard cache table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS generation_cache (
+                    cache_key CHAR(64) PRIMARY KEY,
+                    payload MEDIUMTEXT NOT NULL,
+                    size_bytes INT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP NOT NULL,
+                    INDEX idx_created_at (created_at),
+                    INDEX idx_expires_at (expires_at)
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            print("✅ Generation cache table created")
+            
+            # QA answer memo table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS qa_answers (
+                    memo_key CHAR(64) PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    model VARCHAR(255) NOT NULL,
+                    answer TEXT NOT NULL,
+                    size_bytes INT NOT NULL,
+                    hits INT DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_last_used_at (last_used_at)
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            print("✅ QA answer memo table created")
+            
+            # Outbound email queue
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS email_outbox (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    idempotency_key VARCHAR(191) NOT NULL UNIQUE,
+                    kind VARCHAR(50) NOT NULL,
+                    recipient VARCHAR(120) NOT NULL,
+                    payload TEXT NOT NULL,
+                    status ENUM('pending', 'sending', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+                    attempts INT NOT NULL DEFAULT 0,
+                    last_error VARCHAR(255),
+                    claimed_by CHAR(32),
+                    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    claimed_at TIMESTAMP NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    sent_at TIMESTAMP NULL,
+                    INDEX idx_outbox_status_available (status, available_at, id),
+                    INDEX idx_sent_at (sent_at)
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            print("✅ Email outbox table created")
         
         connection.commit()
         connection.close()
@@ -147,6 +331,32 @@ def create_tables():
         print(f"❌ Error creating tables: {e}")
         return False
 
+def upgrade_schema(stamp_legacy=False):
+    """Apply pending Alembic migrations through Flask-Migrate"""
+    try:
+        from flask_migrate import stamp, upgrade
+        from app import create_app
+        from config import get_config
+        from utils.schema_utils import MIGRATIONS_DIR, database_revisions
+        
+        class MigrationConfig(get_config()):
+            SCHEMA_VERSION_CHECK = 'off'
+            OUTBOX_INPROCESS_WORKER = False
+            STUDY_ROLLUP_INTERVAL = 0
+        
+        app = create_app(MigrationConfig)
+        with app.app_context():
+            if stamp_legacy and not database_revisions():
+                stamp(directory=MIGRATIONS_DIR, revision=LEGACY_SCHEMA_REVISION)
+                print(f"✅ Schema marked as migration {LEGACY_SCHEMA_REVISION}")
+            upgrade(directory=MIGRATIONS_DIR)
+            print(f"✅ Schema at migration {', '.join(database_revisions())}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error applying migrations: {e}")
+        return False
+
 def insert_sample_data():
     """Insert sample data for testing"""
     try:
@@ -195,14 +405,24 @@ def main():
         print("❌ Migration failed at database creation")
         return
     
-    # Step 2: Create tables
-    print("\n2. Creating tables...")
-    if not create_tables():
-        print("❌ Migration failed at table creation")
+    # Step 2: Create tables (databases not yet managed by migrations only)
+    versioned = schema_is_versioned()
+    if versioned:
+        print("\n2. Tables are managed by migrations, skipping table creation")
+    else:
+        print("\n2. Creating tables...")
+        if not create_tables():
+            print("❌ Migration failed at table creation")
+            return
+    
+    # Step 3: Apply migrations
+    print("\n3. Applying migrations...")
+    if not upgrade_schema(stamp_legacy=not versioned):
+        print("❌ Migration failed while applying migrations")
         return
     
-    # Step 3: Insert sample data
-    print("\n3. Setting up sample data...")
+    # Step 4: Insert sample data
+    print("\n4. Setting up sample data...")
     insert_sample_data()
     
     print("\n" + "=" * 50)
@@ -0,0 +1,68 @@
+"""flashcard search index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 19:45:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# SQLite (local and test runs) searches through an FTS5 table kept in sync by triggers
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(
+        title, question, answer, content='flashcards', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flashcards_fts_insert AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts(rowid, title, question, answer)
+        VALUES (new.id, new.title, new.question, new.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flashcards_fts_delete AFTER DELETE ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, title, question, answer)
+        VALUES ('delete', old.id, old.title, old.question, old.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flashcards_fts_update AFTER UPDATE OF title, question, answer ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, title, question, answer)
+        VALUES ('delete', old.id, old.title, old.question, old.answer);
+        INSERT INTO flashcards_fts(rowid, title, question, answer)
+        VALUES (new.id, new.title, new.question, new.answer);
+    END
+    """
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # Index cards saved before the FTS table existed
+        op.execute("INSERT INTO flashcards_fts(flashcards_fts) VALUES ('rebuild')")
+    elif bind.dialect.name == 'mysql':
+        indexes = {index['name'] for index in sa.inspect(bind).get_indexes('flashcards')}
+        if 'ft_flashcards_text' not in indexes:
+            op.create_index('ft_flashcards_text', 'flashcards', ['title', 'question', 'answer'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for trigger in ('flashcards_fts_insert', 'flashcards_fts_delete', 'flashcards_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS flashcards_fts")
+    elif bind.dialect.name == 'mysql':
+        op.drop_index('ft_flashcards_text', table_name='flashcards')
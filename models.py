@@ -1,9 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.auth_utils import hash_password, verify_password
+from utils.db_utils import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -21,16 +22,20 @@ class User(UserMixin, db.Model):
     payments = db.relationship('Payment', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
     
     def __repr__(self):
         return f'<User {self.username}>'
 
 class Flashcard(db.Model):
     __tablename__ = 'flashcards'
+    __table_args__ = (
+        db.Index('idx_user_created_id', 'user_id', 'created_at', 'id'),
+        db.Index('idx_user_due_id', 'user_id', 'due_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -40,6 +45,15 @@ class Flashcard(db.Model):
     difficulty = db.Column(db.String(20), default='medium')
     times_studied = db.Column(db.Integer, default=0)
     correct_answers = db.Column(db.Integer, default=0)
+    job_id = db.Column(db.String(32), db.ForeignKey('generation_jobs.id', ondelete='SET NULL'), index=True)
+    
+    # Spaced repetition (SM-2) state
+    ease_factor = db.Column(db.Float, default=2.5, nullable=False)
+    interval_days = db.Column(db.Integer, default=0, nullable=False)
+    repetitions = db.Column(db.Integer, default=0, nullable=False)
+    due_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_reviewed_at = db.Column(db.DateTime)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -47,6 +61,10 @@ class Flashcard(db.Model):
 
 class Suggestion(db.Model):
     __tablename__ = 'suggestions'
+    __table_args__ = (
+        db.Index('idx_suggestions_user_created', 'user_id', 'created_at'),
+        db.Index('idx_suggestions_email_sent_user', 'email_sent', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -71,4 +89,126 @@ class Payment(db.Model):
     paid_at = db.Column(db.DateTime)
     
     def __repr__(self):
-        return f'<Payment {self.intasend_invoice_id}>'
\ No newline at end of file
+        return f'<Payment {self.intasend_invoice_id}>'
+
+class GenerationCache(db.Model):
+    __tablename__ = 'generation_cache'
+    
+    cache_key = db.Column(db.String(64), primary_key=True)   # sha256 of model + normalized text
+    payload = db.Column(db.Text, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<GenerationCache {self.cache_key[:12]}>'
+
+
+class QAAnswer(db.Model):
+    __tablename__ = 'qa_answers'
+    
+    memo_key = db.Column(db.String(64), primary_key=True)   # sha256 of model + question + chunk hash
+    question = db.Column(db.Text, nullable=False)
+    model = db.Column(db.String(255), nullable=False)
+    answer = db.Column(db.Text, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<QAAnswer {self.memo_key[:12]}>'
+
+
+class GenerationJob(db.Model):
+    __tablename__ = 'generation_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)   # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued')   # queued, running, done, failed
+    card_count = db.Column(db.Integer, default=0)
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<GenerationJob {self.id}>'
+
+
+class StudySession(db.Model):
+    __tablename__ = 'study_sessions'   # append-only log of study answers
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    flashcard_id = db.Column(db.Integer, db.ForeignKey('flashcards.id', ondelete='CASCADE'), nullable=False, index=True)
+    is_correct = db.Column(db.Boolean)
+    time_spent = db.Column(db.Integer, default=0)   # milliseconds
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StudySession {self.id}>'
+
+
+class CardDailyStat(db.Model):
+    __tablename__ = 'card_daily_stats'
+    
+    flashcard_id = db.Column(db.Integer, db.ForeignKey('flashcards.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    correct = db.Column(db.Integer, default=0, nullable=False)
+    time_spent = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    __table_args__ = (db.Index('idx_card_stats_user_day', 'user_id', 'day'),)
+    
+    def __repr__(self):
+        return f'<CardDailyStat {self.flashcard_id} {self.day}>'
+
+
+class UserDailyStat(db.Model):
+    __tablename__ = 'user_daily_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    correct = db.Column(db.Integer, default=0, nullable=False)
+    time_spent = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<UserDailyStat {self.user_id} {self.day}>'
+
+
+class RollupState(db.Model):
+    __tablename__ = 'rollup_state'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, default=0, nullable=False)   # highest study_sessions.id rolled up
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RollupState {self.name} {self.last_event_id}>'
+
+
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('idx_outbox_status_available', 'status', 'available_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(191), unique=True, nullable=False)
+    kind = db.Column(db.String(50), nullable=False)   # suggestion_confirmation, welcome
+    recipient = db.Column(db.String(120), nullable=False)
+    payload = db.Column(db.Text, nullable=False)   # JSON template context
+    status = db.Column(db.String(20), default='pending', nullable=False)   # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.String(255))
+    claimed_by = db.Column(db.String(32))
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, index=True)
+    
+    def __repr__(self):
+        return f'<EmailOutbox {self.idempotency_key} {self.status}>'
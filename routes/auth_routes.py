@@ -1,10 +1,30 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from models import db, User
-from werkzeug.security import generate_password_hash
+from utils.email_utils import send_welcome_email
+from utils.auth_utils import HashingOverloaded, needs_rehash, ip_limiter, email_limiter
 
 auth_bp = Blueprint('auth', __name__)
 
+def client_ip():
+    """The client's address, resolved through trusted proxies by ProxyFix (see PROXY_FIX_X_FOR)"""
+    return request.remote_addr or 'unknown'
+
+def _rejected(template, error_msg, status, retry_after):
+    """Refuse an auth request early with a Retry-After header"""
+    if request.is_json:
+        response = jsonify({'success': False, 'error': error_msg})
+    else:
+        flash(error_msg, 'error')
+        response = render_template(template)
+    return response, status, {'Retry-After': str(retry_after)}
+
+def _too_many_attempts(template, limiter, key):
+    return _rejected(template, 'Too many attempts. Please try again later.', 429, limiter.retry_after(key))
+
+def _hashing_busy(template):
+    return _rejected(template, 'The server is busy. Please try again in a moment.', 503, 1)
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
@@ -19,14 +39,39 @@ def login():
             email = request.form.get('email')
             password = request.form.get('password')
         
+        # Shed throttled attempts before touching the database or the hashing pool
+        ip = client_ip()
+        email_key = (email or '').strip().lower()
+        if not ip_limiter.hit(ip):
+            return _too_many_attempts('login.html', ip_limiter, ip)
+        if email_limiter.blocked(email_key):
+            return _too_many_attempts('login.html', email_limiter, email_key)
+        
         user = User.query.filter_by(email=email).first()
         
-        if user and user.check_password(password):
+        try:
+            authenticated = bool(user and password and user.check_password(password))
+        except HashingOverloaded:
+            return _hashing_busy('login.html')
+        
+        if authenticated:
+            email_limiter.reset(email_key)
+            if needs_rehash(user.password_hash):
+                # Hash parameters changed since this password was set
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except HashingOverloaded:
+                    pass
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error rehashing password for user {user.id}: {e}")
             login_user(user, remember=True)
             if request.is_json:
                 return jsonify({'success': True, 'redirect': url_for('index')})
             return redirect(url_for('index'))
         else:
+            email_limiter.hit(email_key)
             error_msg = 'Invalid email or password'
             if request.is_json:
                 return jsonify({'success': False, 'error': error_msg}), 401
@@ -50,6 +95,10 @@ def signup():
             email = request.form.get('email')
             password = request.form.get('password')
         
+        ip = client_ip()
+        if not ip_limiter.hit(ip):
+            return _too_many_attempts('signup.html', ip_limiter, ip)
+        
         # Validation
         if not username or not email or not password:
             error_msg = 'All fields are required'
@@ -75,11 +124,15 @@ def signup():
         
         # Create new user
         user = User(username=username, email=email)
-        user.set_password(password)
+        try:
+            user.set_password(password)
+        except HashingOverloaded:
+            return _hashing_busy('signup.html')
         
         try:
             db.session.add(user)
             db.session.commit()
+            send_welcome_email(user)
             login_user(user, remember=True)
             
             if request.is_json:
@@ -1,19 +1,134 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for
+import base64
+import json
+import time
+from datetime import datetime
+from flask import Blueprint, Response, render_template, request, jsonify, redirect, url_for, current_app, stream_with_context
 from flask_login import login_required, current_user
-from models import db, Flashcard
-from utils.ai_utils import generate_flashcards_from_text
+from models import db, Flashcard, GenerationJob
+from utils.ai_utils import generate_flashcards_from_text, iter_flashcards_from_text
+from utils.job_utils import enqueue_generation_job
+from utils.search_utils import search_flashcards
+from utils.bulk_utils import bulk_insert_flashcards
+from utils.db_utils import pin_to_primary, read_replica
+from utils.deck_utils import EXPORT_FORMATS, detect_import_format, import_deck, iter_export
+from utils.srs_utils import get_due_cards, count_due_cards
+from utils.study_utils import apply_study_events, parse_study_events, get_study_stats
+from config import Config
 
 flashcard_bp = Blueprint('flashcard', __name__)
 
+def serialize_flashcard(flashcard):
+    """JSON representation of a saved flashcard"""
+    return {
+        'id': flashcard.id,
+        'title': flashcard.title,
+        'question': flashcard.question,
+        'answer': flashcard.answer,
+        'difficulty': flashcard.difficulty,
+        'times_studied': flashcard.times_studied,
+        'correct_answers': flashcard.correct_answers,
+        'due_at': flashcard.due_at.isoformat() if flashcard.due_at else None,
+        'created_at': flashcard.created_at.isoformat() if flashcard.created_at else None
+    }
+
+def encode_cursor(flashcard):
+    """Opaque keyset cursor pointing just past the given flashcard"""
+    raw = f"{flashcard.created_at.isoformat()}|{flashcard.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor, or raise ValueError"""
+    created_at, flashcard_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+    return datetime.fromisoformat(created_at), int(flashcard_id)
+
+def get_flashcard_page(user_id, cursor=None, limit=None):
+    """
+    One page of a user's flashcards, newest first, and the cursor for the next page
+    
+    Uses keyset pagination on (user_id, created_at, id) so every page is an
+    index range scan, no matter how deep into the library it is.
+    """
+    limit = min(limit or Config.LIBRARY_PAGE_SIZE, Config.LIBRARY_MAX_PAGE_SIZE)
+    query = Flashcard.query.filter(Flashcard.user_id == user_id)
+    
+    if cursor:
+        query = query.filter(db.tuple_(Flashcard.created_at, Flashcard.id) < decode_cursor(cursor))
+    
+    flashcards = query.order_by(Flashcard.created_at.desc(), Flashcard.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(flashcards) > limit:
+        flashcards = flashcards[:limit]
+        next_cursor = encode_cursor(flashcards[-1])
+    
+    return flashcards, next_cursor
+
+def get_library_stats(user_id):
+    """Totals for the library header, computed in the database"""
+    total, studied, study_count = db.session.query(
+        db.func.count(Flashcard.id),
+        db.func.coalesce(db.func.sum(db.case((Flashcard.times_studied > 0, 1), else_=0)), 0),
+        db.func.coalesce(db.func.sum(Flashcard.times_studied), 0)
+    ).filter(Flashcard.user_id == user_id).one()
+    
+    return {
+        'total': total,
+        'studied': int(studied),
+        'average_studies': round(int(study_count) / total, 1) if total else 0
+    }
+
+def serialize_job(job):
+    """JSON representation of a generation job's status"""
+    return {
+        'id': job.id,
+        'status': job.status,
+        'count': job.card_count,
+        'error': job.error,
+        'status_url': url_for('flashcard.job_status', job_id=job.id),
+        'events_url': url_for('flashcard.job_events', job_id=job.id)
+    }
+
+def get_study_source():
+    """
+    Study material from an uploaded file, or the text field of a JSON/form body
+    
+    Returns (source, options, error). Uploads are returned as file objects so
+    large documents are streamed instead of read into memory.
+    """
+    options = request.get_json(silent=True) or request.form
+    upload = request.files.get('file')
+    
+    if upload and upload.filename:
+        return upload.stream, options, None
+    
+    text = options.get('text', '').strip()
+    if len(text) < 50:
+        return None, options, 'Please provide at least 50 characters of study material'
+    
+    return text, options, None
+
+def get_job_cards(job_id, after_id):
+    """Cards saved for a job with ids greater than after_id"""
+    return Flashcard.query.filter(
+        Flashcard.job_id == job_id,
+        Flashcard.id > after_id
+    ).order_by(Flashcard.id.asc()).all()
+
 @flashcard_bp.route('/generate', methods=['POST'])
 @login_required
 def generate():
     try:
-        data = request.get_json()
-        text = data.get('text', '').strip()
+        text, options, error = get_study_source()
+        
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        if len(text) < 50:
-            return jsonify({'success': False, 'error': 'Please provide at least 50 characters of study material'}), 400
+        # Job mode: queue the work and let the client poll or subscribe
+        if options.get('async') in (True, 'true', '1'):
+            # The job commits outside this request; keep the user's next reads on the primary
+            pin_to_primary(Config.FLASHCARD_GENERATION_DEADLINE)
+            job = enqueue_generation_job(current_app._get_current_object(), current_user.id, text)
+            return jsonify({'success': True, 'job': serialize_job(job)}), 202
         
         # Generate flashcards using AI
         flashcards_data = generate_flashcards_from_text(text)
@@ -22,72 +137,333 @@ def generate():
             return jsonify({'success': False, 'error': 'Failed to generate flashcards. Please try again.'}), 500
         
         # Save flashcards to database
-        saved_flashcards = []
-        for card_data in flashcards_data:
-            flashcard = Flashcard(
-                user_id=current_user.id,
-                title=card_data['title'],
-                question=card_data['question'],
-                answer=card_data['answer'],
-                difficulty=card_data.get('difficulty', 'medium')
-            )
-            db.session.add(flashcard)
-            saved_flashcards.append({
-                'title': flashcard.title,
-                'question': flashcard.question,
-                'answer': flashcard.answer,
-                'difficulty': flashcard.difficulty
-            })
-        
+        ids = bulk_insert_flashcards(current_user.id, flashcards_data)
         db.session.commit()
         
+        saved_flashcards = [{
+            'id': flashcard_id,
+            'title': card_data['title'],
+            'question': card_data['question'],
+            'answer': card_data['answer'],
+            'difficulty': card_data.get('difficulty', 'medium')
+        } for flashcard_id, card_data in zip(ids, flashcards_data)]
+        
         return jsonify({
             'success': True, 
             'flashcards': saved_flashcards,
             'count': len(saved_flashcards)
         })
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': 'An error occurred while generating flashcards'}), 500
 
+@flashcard_bp.route('/generate/stream', methods=['POST'])
+@login_required
+def generate_stream():
+    text, options, error = get_study_source()
+    
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    use_sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+    user_id = current_user.id
+    # Batches are saved after the headers (and session cookie) have gone out, so pin now
+    pin_to_primary(Config.FLASHCARD_GENERATION_DEADLINE)
+    
+    def encode(event, payload):
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({'event': event, 'data': payload}) + '\n'
+    
+    def save(batch):
+        bulk_insert_flashcards(user_id, batch)
+        db.session.commit()
+    
+    def card_stream():
+        batch = []
+        count = 0
+        
+        try:
+            # Cards go out as soon as they exist; saving happens in small batches
+            for card_data in iter_flashcards_from_text(text):
+                batch.append(card_data)
+                count += 1
+                yield encode('card', {
+                    'title': card_data['title'],
+                    'question': card_data['question'],
+                    'answer': card_data['answer'],
+                    'difficulty': card_data.get('difficulty', 'medium')
+                })
+                
+                if len(batch) >= Config.STREAM_SAVE_BATCH_SIZE:
+                    save(batch)
+                    batch = []
+            
+            if batch:
+                save(batch)
+        except GeneratorExit:
+            # The client went away; keep the cards it has already been shown
+            if batch:
+                try:
+                    save(batch)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error saving streamed flashcards: {e}")
+            raise
+        except Exception as e:
+            db.session.rollback()
+            yield encode('error', {'error': 'An error occurred while generating flashcards'})
+            return
+        
+        if count:
+            yield encode('done', {'count': count})
+        else:
+            yield encode('error', {'error': 'Failed to generate flashcards. Please try again.'})
+    
+    return Response(
+        stream_with_context(card_stream()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@flashcard_bp.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = GenerationJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    # Keep the user on the primary while they follow a job, so /library sees its cards
+    pin_to_primary()
+    after_id = request.args.get('after', 0, type=int)
+    cards = [serialize_flashcard(card) for card in get_job_cards(job.id, after_id)]
+    
+    return jsonify({'success': True, 'job': serialize_job(job), 'flashcards': cards})
+
+@flashcard_bp.route('/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    job = GenerationJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    pin_to_primary(Config.JOB_STREAM_TIMEOUT)
+    
+    # EventSource sends the last card id back when it reconnects
+    after_id = request.args.get('after', type=int) or request.headers.get('Last-Event-ID', 0, type=int)
+    
+    def event_stream():
+        last_id = after_id
+        deadline = time.monotonic() + Config.JOB_STREAM_TIMEOUT
+        
+        while True:
+            # End the previous transaction so new commits from the worker are visible
+            db.session.rollback()
+            current_job = db.session.get(GenerationJob, job_id)
+            if current_job is None:
+                yield f"event: done\ndata: {json.dumps({'status': 'failed', 'error': 'Job not found'})}\n\n"
+                return
+            
+            for card in get_job_cards(job_id, last_id):
+                last_id = card.id
+                yield f"id: {card.id}\nevent: card\ndata: {json.dumps(serialize_flashcard(card))}\n\n"
+            
+            if current_job.status in ('done', 'failed'):
+                yield f"event: done\ndata: {json.dumps(serialize_job(current_job))}\n\n"
+                return
+            
+            # Don't hold a worker for the whole job; the client carries on by polling /jobs/<id>
+            if time.monotonic() > deadline:
+                yield f"event: timeout\ndata: {json.dumps({'job': serialize_job(current_job), 'after': last_id})}\n\n"
+                return
+            
+            time.sleep(Config.JOB_POLL_INTERVAL)
+    
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @flashcard_bp.route('/library')
 @login_required
+@read_replica
 def library():
-    flashcards = Flashcard.query.filter_by(user_id=current_user.id).order_by(Flashcard.created_at.desc()).all()
-    return render_template('flashcards.html', flashcards=flashcards)
+    flashcards, next_cursor = get_flashcard_page(current_user.id)
+    return render_template(
+        'flashcards.html',
+        flashcards=flashcards,
+        next_cursor=next_cursor,
+        stats=get_library_stats(current_user.id)
+    )
+
+@flashcard_bp.route('/api/cards')
+@login_required
+@read_replica
+def card_page():
+    try:
+        flashcards, next_cursor = get_flashcard_page(
+            current_user.id,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int)
+        )
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'success': True,
+        'flashcards': [serialize_flashcard(card) for card in flashcards],
+        'next_cursor': next_cursor
+    })
+
+@flashcard_bp.route('/api/due')
+@login_required
+@read_replica
+def due_cards():
+    try:
+        flashcards, next_cursor = get_due_cards(
+            current_user.id,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            ahead=request.args.get('ahead', '').lower() in ('1', 'true', 'yes')
+        )
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'success': True,
+        'flashcards': [serialize_flashcard(card) for card in flashcards],
+        'next_cursor': next_cursor,
+        'due_count': count_due_cards(current_user.id) if not request.args.get('cursor') else None
+    })
+
+@flashcard_bp.route('/api/search')
+@login_required
+@read_replica
+def search():
+    page = request.args.get('page', 1, type=int)
+    flashcards, has_more = search_flashcards(
+        current_user.id,
+        request.args.get('q', ''),
+        page=page,
+        difficulty=request.args.get('difficulty') or None,
+        per_page=request.args.get('limit', type=int)
+    )
+    
+    return jsonify({
+        'success': True,
+        'flashcards': [serialize_flashcard(card) for card in flashcards],
+        'page': page,
+        'has_more': has_more
+    })
 
 @flashcard_bp.route('/study/<int:flashcard_id>')
 @login_required
+@read_replica
 def study_single(flashcard_id):
     flashcard = Flashcard.query.filter_by(id=flashcard_id, user_id=current_user.id).first_or_404()
-    return render_template('flashcards.html', flashcards=[flashcard], study_mode=True)
+    return render_template(
+        'flashcards.html',
+        flashcards=[flashcard],
+        study_cards=[serialize_flashcard(flashcard)],
+        study_mode=True
+    )
 
 @flashcard_bp.route('/study/all')
 @login_required
 def study_all():
-    flashcards = Flashcard.query.filter_by(user_id=current_user.id).all()
-    return render_template('flashcards.html', flashcards=flashcards, study_mode=True)
+    # Cards are fetched lazily from the due queue by the study session in flashcards.js
+    return render_template('flashcards.html', flashcards=[], study_mode=True)
 
 @flashcard_bp.route('/update_stats', methods=['POST'])
 @login_required
 def update_stats():
     try:
         data = request.get_json()
-        flashcard_id = data.get('flashcard_id')
-        is_correct = data.get('is_correct', False)
-        
-        flashcard = Flashcard.query.filter_by(id=flashcard_id, user_id=current_user.id).first()
-        if flashcard:
-            flashcard.times_studied += 1
-            if is_correct:
-                flashcard.correct_answers += 1
-            db.session.commit()
-            
+        apply_study_events(current_user.id, parse_study_events([data]))
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@flashcard_bp.route('/track_progress', methods=['POST'])
+@login_required
+def track_progress():
+    try:
+        data = request.get_json() or {}
+        # trackStudyProgress reports time_spent in milliseconds
+        event = dict(data, time_spent_ms=data.get('time_spent_ms', data.get('time_spent')))
+        apply_study_events(current_user.id, parse_study_events([event]))
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@flashcard_bp.route('/study_events', methods=['POST'])
+@login_required
+def study_events():
+    try:
+        # Beacons sent on page unload may not carry a JSON content type
+        data = request.get_json(force=True, silent=True) or {}
+        raw_events = data.get('events')
+        
+        if not isinstance(raw_events, list):
+            return jsonify({'success': False, 'error': 'Expected a list of events'}), 400
+        
+        events = parse_study_events(raw_events)
+        updated = apply_study_events(current_user.id, events)
+        return jsonify({'success': True, 'accepted': len(events), 'cards': updated})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@flashcard_bp.route('/api/stats')
+@login_required
+@read_replica
+def study_stats():
+    days = request.args.get('days', 30, type=int)
+    flashcard_id = request.args.get('flashcard_id', type=int)
+    return jsonify({'success': True, 'stats': get_study_stats(current_user.id, days, flashcard_id)})
+
+@flashcard_bp.route('/export')
+@login_required
+def export_deck():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    return Response(
+        stream_with_context(iter_export(current_user.id, fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=flashcards.{extension}'}
+    )
+
+@flashcard_bp.route('/import', methods=['POST'])
+@login_required
+def import_cards():
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'success': False, 'error': 'Please choose a deck file to import'}), 400
+    
+    fmt = detect_import_format(upload.filename, request.form.get('format') or request.args.get('format'))
+    if not fmt:
+        return jsonify({'success': False, 'error': 'Unsupported file type. Use CSV, JSON Lines or Anki plain text'}), 400
+    
+    try:
+        imported, skipped = import_deck(current_user.id, upload.stream, fmt)
+    except Exception as e:
+        print(f"Deck import failed: {e}")
+        return jsonify({'success': False, 'error': 'An error occurred while importing the deck'}), 500
+    
+    if not imported:
+        return jsonify({'success': False, 'error': 'No flashcards found in the file', 'skipped': skipped}), 400
+    
+    return jsonify({
+        'success': True,
+        'imported': imported,
+        'skipped': skipped,
+        'message': f'Imported {imported} flashcards'
+    })
+
 @flashcard_bp.route('/delete/<int:flashcard_id>', methods=['DELETE'])
 @login_required
 def delete(flashcard_id):
@@ -1,12 +1,15 @@
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
 from flask_login import login_required, current_user
-from models import db, Suggestion, User
-from utils.email_utils import send_bulk_confirmation_emails
+from models import db, Suggestion
+from utils.auth_utils import admin_required
+from utils.db_utils import read_replica
+from utils.outbox_utils import enqueue_suggestion_confirmations, get_outbox_stats
 
 suggestion_bp = Blueprint('suggestion', __name__)
 
 @suggestion_bp.route('/')
 @login_required
+@read_replica
 def suggestions():
     user_suggestions = Suggestion.query.filter_by(user_id=current_user.id).order_by(Suggestion.created_at.desc()).all()
     return render_template('suggestions.html', suggestions=user_suggestions)
@@ -43,7 +46,7 @@ def submit():
         
         flash(success_msg, 'success')
         return redirect(url_for('suggestion.suggestions'))
-        
+    
     except Exception as e:
         db.session.rollback()
         error_msg = 'Failed to submit suggestion. Please try again.'
@@ -56,41 +59,35 @@ def submit():
 @login_required
 def send_confirmations():
     try:
-        # Get all users who submitted suggestions but haven't received confirmation
-        users_with_suggestions = db.session.query(User).join(Suggestion).filter(
-            Suggestion.email_sent == False
-        ).distinct().all()
+        users, queued = enqueue_suggestion_confirmations()
         
-        if not users_with_suggestions:
+        if not users:
             message = 'No pending confirmations to send'
             if request.is_json:
                 return jsonify({'success': True, 'message': message})
             flash(message, 'info')
             return redirect(url_for('suggestion.suggestions'))
         
-        # Send bulk emails
-        success_count = send_bulk_confirmation_emails(users_with_suggestions)
-        
-        if success_count > 0:
-            # Mark suggestions as email sent
-            Suggestion.query.filter_by(email_sent=False).update({'email_sent': True})
-            db.session.commit()
-            
-            message = f'Confirmation emails sent to {success_count} users successfully!'
-            if request.is_json:
-                return jsonify({'success': True, 'message': message})
-            flash(message, 'success')
+        if not queued:
+            message = f'Confirmation emails for {users} users are already waiting to be sent'
         else:
-            error_msg = 'Failed to send confirmation emails'
-            if request.is_json:
-                return jsonify({'success': False, 'error': error_msg}), 500
-            flash(error_msg, 'error')
-        
+            message = f'Queued confirmation emails for {queued} users'
+            if users > queued:
+                message += f' ({users - queued} already waiting to be sent)'
+        if request.is_json:
+            return jsonify({'success': True, 'message': message, 'queued': queued, 'already_queued': users - queued}), 202 if queued else 200
+        flash(message, 'success')
         return redirect(url_for('suggestion.suggestions'))
-        
+    
     except Exception as e:
         error_msg = f'Error sending confirmations: {str(e)}'
         if request.is_json:
             return jsonify({'success': False, 'error': error_msg}), 500
         flash(error_msg, 'error')
-        return redirect(url_for('suggestion.suggestions'))
\ No newline at end of file
+        return redirect(url_for('suggestion.suggestions'))
+
+@suggestion_bp.route('/outbox/stats')
+@login_required
+@admin_required
+def outbox_stats():
+    return jsonify({'success': True, 'stats': get_outbox_stats()})
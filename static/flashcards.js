@@ -2,6 +2,20 @@
 let currentFlashcards = [];
 let studyMode = false;
 
+// Study session state; cards are fetched lazily in batches
+const STUDY_BATCH_SIZE = 20;
+let studyCards = [];
+let studyIndex = 0;
+let studyCursor = null;
+let studyExhausted = false;
+let studyLoading = null;
+
+// Study events are buffered and sent in batches
+const STUDY_EVENTS_URL = '/flashcards/study_events';
+const STUDY_FLUSH_INTERVAL = 5000;
+let pendingStudyEvents = [];
+let cardShownAt = Date.now();
+
 // Utility functions
 function showNotification(message, type = 'info') {
     const notification = document.createElement('div');
@@ -21,6 +35,12 @@ function showNotification(message, type = 'info') {
     }, 5000);
 }
 
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+}
+
 function formatDate(dateString) {
     const date = new Date(dateString);
     return date.toLocaleDateString('en-US', {
@@ -170,33 +190,369 @@ function enhanceFlashcardInteractions() {
     });
 }
 
-// Library search functionality
-function filterFlashcards() {
-    const searchTerm = document.getElementById('search-input').value.toLowerCase();
-    const cards = document.querySelectorAll('.library-card');
-    let visibleCount = 0;
-    
-    cards.forEach(card => {
-        const title = card.dataset.title || '';
-        const question = card.dataset.question || '';
-        const answer = card.dataset.answer || '';
+// Library infinite scroll
+function createLibraryCard(card) {
+    const cardDiv = document.createElement('div');
+    cardDiv.className = 'library-card';
+    cardDiv.dataset.cardId = card.id;
+    cardDiv.dataset.difficulty = card.difficulty;
+    cardDiv.dataset.title = (card.title || '').toLowerCase();
+    cardDiv.dataset.question = (card.question || '').toLowerCase();
+    cardDiv.dataset.answer = (card.answer || '').toLowerCase();
+    cardDiv.innerHTML = `
+        <div class="card-preview-header">
+            <h4>${escapeHtml(card.title)}</h4>
+            <span class="difficulty-badge difficulty-${escapeHtml(card.difficulty)}">${escapeHtml(card.difficulty)}</span>
+        </div>
+        <div class="card-content">
+            <div class="question-section">
+                <h4>Question</h4>
+                <p>${escapeHtml(card.question)}</p>
+            </div>
+            <div class="answer-section">
+                <h4>Answer</h4>
+                <p>${escapeHtml(card.answer)}</p>
+            </div>
+        </div>
+        <div class="card-stats">
+            <div class="stat">
+                <span class="stat-number">${card.times_studied || 0}</span>
+                <span class="stat-label">Studied</span>
+            </div>
+            <div class="stat">
+                <span class="stat-number">${card.correct_answers || 0}</span>
+                <span class="stat-label">Correct</span>
+            </div>
+        </div>
+        <div class="card-actions">
+            <a href="/flashcards/study/${card.id}" class="study-all-btn">🎯 Study</a>
+            <button onclick="deleteFlashcard(${card.id})" class="delete-btn">Delete</button>
+        </div>
+    `;
+    return cardDiv;
+}
+
+function initLibraryScroll() {
+    initSearchScroll();
+    
+    const sentinel = document.getElementById('loadMoreSentinel');
+    const grid = document.getElementById('flashcardGrid');
+    if (!sentinel || !grid || !sentinel.dataset.nextCursor) return;
+    
+    let loading = false;
+    
+    async function loadNextPage() {
+        const cursor = sentinel.dataset.nextCursor;
+        if (loading || !cursor) return;
+        loading = true;
         
-        const isVisible = title.includes(searchTerm) || 
-                         question.includes(searchTerm) || 
-                         answer.includes(searchTerm);
+        try {
+            const response = await fetch(`/flashcards/api/cards?cursor=${encodeURIComponent(cursor)}`);
+            const data = await response.json();
+            
+            if (data.success) {
+                data.flashcards.forEach(card => grid.appendChild(createLibraryCard(card)));
+                sentinel.dataset.nextCursor = data.next_cursor || '';
+            }
+        } catch (error) {
+            showNotification('Failed to load more flashcards', 'error');
+        } finally {
+            loading = false;
+        }
         
-        if (isVisible) {
-            card.style.display = 'block';
-            visibleCount++;
-        } else {
-            card.style.display = 'none';
+        if (!sentinel.dataset.nextCursor) {
+            observer.disconnect();
+        }
+    }
+    
+    const observer = new IntersectionObserver(entries => {
+        if (!searchState && entries.some(entry => entry.isIntersecting)) {
+            loadNextPage();
         }
+    }, { rootMargin: '400px' });
+    
+    observer.observe(sentinel);
+}
+
+// Study session with lazily loaded cards
+async function loadStudyBatch() {
+    if (studyExhausted) return;
+    if (studyLoading) return studyLoading;
+    
+    // Soonest-due cards first; cards not yet due follow so the whole deck can be reviewed
+    const params = new URLSearchParams({ limit: STUDY_BATCH_SIZE, ahead: 1 });
+    if (studyCursor) params.set('cursor', studyCursor);
+    
+    studyLoading = fetch(`/flashcards/api/due?${params}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.error);
+            studyCards.push(...data.flashcards);
+            studyCursor = data.next_cursor;
+            studyExhausted = !data.next_cursor;
+        })
+        .catch(() => showNotification('Failed to load flashcards', 'error'))
+        .finally(() => { studyLoading = null; });
+    
+    return studyLoading;
+}
+
+async function startStudySession(initialCards) {
+    // Cards handed over from the generator page take priority
+    const stored = sessionStorage.getItem('studyFlashcards');
+    sessionStorage.removeItem('studyFlashcards');
+    
+    studyCards = stored ? JSON.parse(stored) : (initialCards || []);
+    studyIndex = 0;
+    studyCursor = null;
+    studyExhausted = studyCards.length > 0;
+    
+    if (!studyCards.length) {
+        await loadStudyBatch();
+    }
+    
+    if (!studyCards.length) {
+        showNotification('No flashcards to study yet', 'info');
+        return;
+    }
+    
+    studyMode = true;
+    document.getElementById('studyMode').style.display = 'block';
+    document.getElementById('libraryView').style.display = 'none';
+    renderStudyCard();
+}
+
+function exitStudyMode() {
+    studyMode = false;
+    document.getElementById('studyMode').style.display = 'none';
+    document.getElementById('libraryView').style.display = 'block';
+    
+    if (window.location.pathname.includes('/study')) {
+        window.location.href = '/flashcards/library';
+    }
+}
+
+function renderStudyCard() {
+    const card = studyCards[studyIndex];
+    if (!card) return;
+    
+    document.getElementById('studyCard').classList.remove('flipped');
+    cardShownAt = Date.now();
+    document.getElementById('cardTitle').textContent = card.title;
+    document.getElementById('cardDifficulty').textContent = card.difficulty;
+    document.getElementById('cardQuestion').textContent = card.question;
+    document.getElementById('cardAnswer').textContent = card.answer;
+    
+    const total = studyExhausted ? studyCards.length : `${studyCards.length}+`;
+    document.getElementById('currentCard').textContent = studyIndex + 1;
+    document.getElementById('totalCards').textContent = total;
+    document.getElementById('progressFill').style.width = `${((studyIndex + 1) / studyCards.length) * 100}%`;
+    document.getElementById('prev-card').disabled = studyIndex === 0;
+    document.getElementById('next-card').disabled = studyExhausted && studyIndex >= studyCards.length - 1;
+    
+    // Prefetch the next batch before the user runs out of cards
+    if (studyCards.length - studyIndex <= 5) {
+        loadStudyBatch().then(() => {
+            document.getElementById('totalCards').textContent = studyExhausted ? studyCards.length : `${studyCards.length}+`;
+            document.getElementById('next-card').disabled = studyExhausted && studyIndex >= studyCards.length - 1;
+        });
+    }
+}
+
+function flipStudyCard() {
+    document.getElementById('studyCard').classList.toggle('flipped');
+}
+
+async function nextCard() {
+    if (studyIndex >= studyCards.length - 1) {
+        await loadStudyBatch();
+    }
+    if (studyIndex < studyCards.length - 1) {
+        studyIndex++;
+        renderStudyCard();
+    } else {
+        showNotification('🎉 You have finished this study session!', 'success');
+    }
+}
+
+function previousCard() {
+    if (studyIndex > 0) {
+        studyIndex--;
+        renderStudyCard();
+    }
+}
+
+function markAnswer(isCorrect) {
+    const card = studyCards[studyIndex];
+    if (card && card.id) {
+        queueStudyEvent(card.id, isCorrect);
+    }
+    nextCard();
+}
+
+// Batched study event delivery
+function queueStudyEvent(cardId, isCorrect) {
+    pendingStudyEvents.push({
+        flashcard_id: cardId,
+        is_correct: isCorrect,
+        time_spent_ms: Date.now() - cardShownAt
     });
+}
+
+function flushStudyEvents() {
+    if (pendingStudyEvents.length === 0) return;
     
-    // Update search results count
+    const events = pendingStudyEvents;
+    pendingStudyEvents = [];
+    
+    fetch(STUDY_EVENTS_URL, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ events: events }),
+        keepalive: true
+    }).then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    }).catch(error => {
+        // Put the events back so the next flush retries them
+        pendingStudyEvents = events.concat(pendingStudyEvents);
+        console.error('Failed to send study events:', error);
+    });
+}
+
+function flushStudyEventsOnUnload() {
+    if (pendingStudyEvents.length === 0) return;
+    
+    const body = new Blob([JSON.stringify({ events: pendingStudyEvents })], { type: 'application/json' });
+    if (navigator.sendBeacon && navigator.sendBeacon(STUDY_EVENTS_URL, body)) {
+        pendingStudyEvents = [];
+    } else {
+        flushStudyEvents();
+    }
+}
+
+setInterval(flushStudyEvents, STUDY_FLUSH_INTERVAL);
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushStudyEventsOnUnload();
+});
+window.addEventListener('pagehide', flushStudyEventsOnUnload);
+
+// Library search functionality (ranked and paginated on the server)
+let searchTimer = null;
+let searchRequest = 0;
+let searchState = null;
+
+function filterFlashcards() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, 250);
+}
+
+function runSearch() {
+    const query = document.getElementById('search-input').value.trim();
+    const difficultyFilter = document.getElementById('difficultyFilter');
+    const difficulty = difficultyFilter ? difficultyFilter.value : '';
+    const libraryGrid = document.getElementById('flashcardGrid');
+    const results = document.getElementById('searchResults');
     const resultsInfo = document.querySelector('.search-results-info');
-    if (resultsInfo) {
-        resultsInfo.textContent = `Showing ${visibleCount} of ${cards.length} flashcards`;
+    if (!libraryGrid || !results) return;
+    
+    if (!query && !difficulty) {
+        searchState = null;
+        results.style.display = 'none';
+        results.innerHTML = '';
+        libraryGrid.style.display = '';
+        if (resultsInfo) resultsInfo.textContent = '';
+        return;
+    }
+    
+    searchState = { query, difficulty, page: 0, hasMore: true, loading: false, count: 0 };
+    results.innerHTML = '';
+    results.style.display = '';
+    libraryGrid.style.display = 'none';
+    loadSearchPage();
+}
+
+async function loadSearchPage() {
+    const state = searchState;
+    if (!state || state.loading || !state.hasMore) return;
+    state.loading = true;
+    
+    const requestId = ++searchRequest;
+    const params = new URLSearchParams({ q: state.query, page: state.page + 1 });
+    if (state.difficulty) params.set('difficulty', state.difficulty);
+    
+    try {
+        const response = await fetch(`/flashcards/api/search?${params}`);
+        const data = await response.json();
+        
+        // Ignore responses for searches the user has already replaced
+        if (state !== searchState || requestId !== searchRequest) return;
+        
+        if (data.success) {
+            const results = document.getElementById('searchResults');
+            data.flashcards.forEach(card => results.appendChild(createLibraryCard(card)));
+            state.page = data.page;
+            state.hasMore = data.has_more;
+            state.count += data.flashcards.length;
+            
+            const resultsInfo = document.querySelector('.search-results-info');
+            if (resultsInfo) {
+                resultsInfo.textContent = `Showing ${state.count}${state.hasMore ? '+' : ''} matching flashcards`;
+            }
+        }
+    } catch (error) {
+        showNotification('Search failed. Please try again.', 'error');
+    } finally {
+        state.loading = false;
+    }
+}
+
+function initSearchScroll() {
+    const sentinel = document.getElementById('searchSentinel');
+    if (!sentinel) return;
+    
+    const observer = new IntersectionObserver(entries => {
+        if (searchState && entries.some(entry => entry.isIntersecting)) {
+            loadSearchPage();
+        }
+    }, { rootMargin: '400px' });
+    
+    observer.observe(sentinel);
+}
+
+// Deck import/export
+function exportDeck() {
+    const format = document.getElementById('exportFormat').value;
+    window.location.href = `/flashcards/export?format=${encodeURIComponent(format)}`;
+}
+
+async function importDeck(input) {
+    const file = input.files[0];
+    if (!file) return;
+    
+    const formData = new FormData();
+    formData.append('file', file);
+    
+    try {
+        showNotification('Importing flashcards...', 'info');
+        const response = await fetch('/flashcards/import', {
+            method: 'POST',
+            body: formData
+        });
+        const data = await response.json();
+        
+        if (data.success) {
+            showNotification(data.message, 'success');
+            setTimeout(() => window.location.reload(), 1000);
+        } else {
+            showNotification(data.error || 'Failed to import flashcards', 'error');
+        }
+    } catch (error) {
+        console.error('Import error:', error);
+        showNotification('Failed to import flashcards', 'error');
+    } finally {
+        input.value = '';
     }
 }
 
@@ -347,4 +703,13 @@ window.displayGeneratedFlashcards = displayGeneratedFlashcards;
 window.startStudyMode = startStudyMode;
 window.deleteFlashcard = deleteFlashcard;
 window.filterFlashcards = filterFlashcards;
-window.showNotification = showNotification;
\ No newline at end of file
+window.showNotification = showNotification;
+window.startStudySession = startStudySession;
+window.exitStudyMode = exitStudyMode;
+window.flipStudyCard = flipStudyCard;
+window.nextCard = nextCard;
+window.previousCard = previousCard;
+window.markAnswer = markAnswer;
+window.initLibraryScroll = initLibraryScroll;
+window.exportDeck = exportDeck;
+window.importDeck = importDeck;
\ No newline at end of file
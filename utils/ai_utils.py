@@ -1,141 +1,344 @@
 import requests
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 from config import Config
+from utils.cache_utils import get_flashcard_cache
+from utils.ingest_utils import hash_document, iter_chunks, iter_document_chunks, iter_sentences, read_prefix, select_chunks
+from utils.keyterm_utils import extract_key_sentences
+from utils.local_qa import LocalExtractiveQA
+from utils.qa_memo import get_memoized_answers, make_memo_key, memoize_answers
+
+_http_session = None
+_http_session_lock = threading.Lock()
 
 def generate_flashcards_from_text(text):
     """
     Generate flashcards from text using Hugging Face Question-Answering API
     """
+    return list(iter_flashcards_from_text(text))
+
+def iter_flashcards_from_text(text):
+    """
+    Yield flashcards as soon as each one is generated
+    
+    `text` may be a string or a file object (e.g. an upload), which is
+    streamed rather than read into memory. Results are cached by a hash of
+    the normalized text and the backend's model, so repeated pastes of the
+    same notes skip generation entirely.
+    """
+    backend = get_generation_backend()
+    cache = get_flashcard_cache()
+    cache_key = hash_document(text, backend.model)
+    
+    flashcards = cache.get(cache_key)
+    if flashcards is not None:
+        yield from flashcards
+        return
+    
+    run = GenerationRun()
+    flashcards = []
     try:
-        # If Hugging Face API key is available, use the real API
-        if Config.HUGGINGFACE_API_KEY:
-            return generate_with_huggingface_api(text)
-        else:
-            # Fallback to mock generation for demo purposes
-            return generate_mock_flashcards(text)
+        for card in backend.iter_flashcards(text, run):
+            flashcards.append(card)
+            yield card
     except Exception as e:
+        run.complete = False
         print(f"Error generating flashcards: {e}")
-        return generate_mock_flashcards(text)
+    
+    # Only a full run is cached; a deadline or error would pin the short deck for FLASHCARD_CACHE_TTL.
+    # Don't cache the mock fallback under another backend's model after a failure either.
+    if flashcards:
+        if run.complete:
+            cache.set(cache_key, flashcards)
+    elif backend.name != 'mock':
+        yield from generate_mock_flashcards(text)
+
+class GenerationRun:
+    """Set by a backend while it generates: `complete` goes False if any cards were dropped"""
+    
+    def __init__(self):
+        self.complete = True
+
+class HuggingFaceBackend:
+    """Remote question answering through the Hugging Face Inference API"""
+    
+    name = 'huggingface'
+    
+    @property
+    def model(self):
+        return Config.HUGGINGFACE_API_URL
+    
+    def iter_flashcards(self, text, run=None):
+        return iter_huggingface_flashcards(text, run)
+
+class MockBackend:
+    """Offline demo cards built straight from the study text"""
+    
+    name = 'mock'
+    model = 'mock'
+    
+    def iter_flashcards(self, text, run=None):
+        return iter(generate_mock_flashcards(text))
+
+class LocalBackend:
+    """
+    In-process extractive question answering on CPU, with no network hop
+    
+    The extractor is built once per worker process and answers every
+    chunk x question pair of a document in one batched call.
+    """
+    
+    name = 'local'
+    model = 'local-extractive-v1'
+    
+    def __init__(self):
+        self.qa = LocalExtractiveQA()
+    
+    def iter_flashcards(self, text, run=None):
+        chunks = select_chunks(iter_document_chunks(text), Config.FLASHCARD_CHUNK_BUDGET)
+        
+        tasks = []
+        for chunk in chunks:
+            for question in generate_questions_for_chunk(chunk)[:2]:
+                tasks.append((question, chunk))
+        
+        answers = self.qa.answer_batch(tasks)
+        
+        # Two questions often land on the same sentence; keep one card per answer
+        seen = set()
+        count = 0
+        for (question, chunk), answer in zip(tasks, answers):
+            if answer in seen:
+                continue
+            card = build_flashcard(question, answer, count + 1)
+            if card:
+                seen.add(answer)
+                count += 1
+                yield card
+
+GENERATION_BACKENDS = {
+    'huggingface': HuggingFaceBackend,
+    'mock': MockBackend,
+    'local': LocalBackend
+}
+
+_generation_backends = {}
+_generation_backends_lock = threading.Lock()
+
+def get_generation_backend(name=None):
+    """
+    Return the flashcard generation backend, created once per worker process
+    
+    With FLASHCARD_BACKEND set to 'auto' the Hugging Face API is used when an
+    API key is configured and the mock generator otherwise.
+    """
+    name = name or Config.FLASHCARD_BACKEND
+    if name == 'auto':
+        name = 'huggingface' if Config.HUGGINGFACE_API_KEY else 'mock'
+    
+    backend = _generation_backends.get(name)
+    if backend is None:
+        if name not in GENERATION_BACKENDS:
+            raise ValueError(f"Unknown flashcard backend: {name}")
+        
+        with _generation_backends_lock:
+            backend = _generation_backends.get(name)
+            if backend is None:
+                backend = GENERATION_BACKENDS[name]()
+                _generation_backends[name] = backend
+    
+    return backend
+
+def get_http_session():
+    """
+    Shared requests session so QA calls reuse pooled keep-alive connections
+    """
+    global _http_session
+    
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=Config.HUGGINGFACE_MAX_WORKERS
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    
+    return _http_session
+
+def query_huggingface_qa(question, context, headers):
+    """
+    Send a single question-answering request and return the answer text
+    """
+    payload = {
+        "inputs": {
+            "question": question,
+            "context": context
+        }
+    }
+    
+    response = get_http_session().post(
+        Config.HUGGINGFACE_API_URL,
+        headers=headers,
+        json=payload,
+        timeout=Config.HUGGINGFACE_REQUEST_TIMEOUT
+    )
+    
+    if response.status_code != 200:
+        return None
+    
+    result = response.json()
+    return result.get('answer', '').strip()
 
 def generate_with_huggingface_api(text):
     """
     Use Hugging Face Question-Answering API to generate flashcards
     """
+    return list(iter_huggingface_flashcards(text))
+
+def iter_huggingface_flashcards(text, run=None):
+    """
+    Yield Hugging Face flashcards in the order their answers arrive
+    
+    Answers already in the QA memo are yielded first; the remaining
+    chunk x question requests are sent concurrently on a bounded thread pool.
+    Requests that fail or have not come back by the generation deadline are
+    dropped, and `run` (a GenerationRun) is marked incomplete.
+    """
     headers = {
         "Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}",
         "Content-Type": "application/json"
     }
     
-    # Split text into chunks for better processing
-    chunks = split_text_into_chunks(text, max_length=500)
-    flashcards = []
+    # Stream the document through chunking and keep a sample that covers it
+    chunks = select_chunks(iter_document_chunks(text), Config.FLASHCARD_CHUNK_BUDGET)
     
-    for i, chunk in enumerate(chunks[:5]):  # Limit to 5 flashcards
+    tasks = []
+    for chunk in chunks:
         # Generate questions based on the text
         questions = generate_questions_for_chunk(chunk)
         
-        for j, question in enumerate(questions[:2]):  # Max 2 questions per chunk
-            payload = {
-                "inputs": {
-                    "question": question,
-                    "context": chunk
-                }
-            }
+        for question in questions[:2]:  # Max 2 questions per chunk
+            tasks.append((question, chunk))
+    
+    if not tasks:
+        return
+    
+    # Only (question, chunk) pairs missing from the memo go to the API
+    model = Config.HUGGINGFACE_API_URL
+    memo_keys = [make_memo_key(question, chunk, model) for question, chunk in tasks]
+    answers = get_memoized_answers(memo_keys)
+    pending = [i for i, key in enumerate(memo_keys) if key not in answers]
+    count = 0
+    
+    for i, key in enumerate(memo_keys):
+        card = build_flashcard(tasks[i][0], answers.get(key), count + 1)
+        if card:
+            count += 1
+            yield card
+    
+    if not pending:
+        return
+    
+    executor = ThreadPoolExecutor(max_workers=min(Config.HUGGINGFACE_MAX_WORKERS, len(pending)))
+    futures = {executor.submit(query_huggingface_qa, tasks[i][0], tasks[i][1], headers): i for i in pending}
+    new_answers = []
+    
+    try:
+        for future in as_completed(futures, timeout=Config.FLASHCARD_GENERATION_DEADLINE):
+            i = futures[future]
             
             try:
-                response = requests.post(
-                    Config.HUGGINGFACE_API_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    answer = result.get('answer', '').strip()
-                    
-                    if answer and len(answer) > 10:
-                        flashcards.append({
-                            'title': f'Concept {len(flashcards) + 1}',
-                            'question': question,
-                            'answer': answer,
-                            'difficulty': determine_difficulty(question, answer)
-                        })
-                        
-            except requests.RequestException as e:
+                answer = future.result()
+            except (requests.RequestException, ValueError) as e:
                 print(f"API request failed: {e}")
+                if run is not None:
+                    run.complete = False
                 continue
+            
+            if answer is None:
+                # Non-200 reply (rate limit, model loading): the deck is short this time
+                if run is not None:
+                    run.complete = False
+                continue
+            
+            new_answers.append((memo_keys[i], tasks[i][0], model, answer))
+            card = build_flashcard(tasks[i][0], answer, count + 1)
+            if card:
+                count += 1
+                yield card
+    except TimeoutError:
+        pending_count = sum(1 for future in futures if not future.done())
+        print(f"Generation deadline reached, dropping {pending_count} pending QA requests")
+        if run is not None:
+            run.complete = False
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        memoize_answers(new_answers)
+
+def build_flashcard(question, answer, number):
+    """
+    Turn a QA answer into a flashcard, or None if the answer is too short
+    """
+    if not answer or len(answer) <= 10:
+        return None
     
-    return flashcards if flashcards else generate_mock_flashcards(text)
+    return {
+        'title': f'Concept {number}',
+        'question': question,
+        'answer': answer,
+        'difficulty': determine_difficulty(question, answer)
+    }
 
 def generate_mock_flashcards(text):
     """
-    Generate mock flashcards for demo purposes when API is not available
+    Generate offline flashcards from the most informative sentences
+    
+    Sentences and key terms are ranked by TF-IDF over the whole document, so
+    cards cover the material rather than just its first few sentences.
     """
-    sentences = [s.strip() for s in text.replace('\n', ' ').split('.') if len(s.strip()) > 20]
     flashcards = []
     
-    for i, sentence in enumerate(sentences[:5]):
-        words = sentence.split()
-        if len(words) < 5:
-            continue
-            
-        # Find key terms (longer words)
-        key_terms = [word for word in words if len(word) > 4 and word.isalpha()]
+    for sentence, key_term in extract_key_sentences(text, Config.OFFLINE_CARD_COUNT):
+        question = f"What is the main concept related to '{key_term}' in this context?"
         
-        if key_terms:
-            key_term = key_terms[0]
-            question = f"What is the main concept related to '{key_term}' in this context?"
-            
-            flashcards.append({
-                'title': f'Study Card {i + 1}',
-                'question': question,
-                'answer': sentence.strip(),
-                'difficulty': 'medium'
-            })
+        flashcards.append({
+            'title': f'Study Card {len(flashcards) + 1}',
+            'question': question,
+            'answer': sentence,
+            'difficulty': 'medium'
+        })
     
     # Ensure we have at least 3 flashcards
-    if len(flashcards) < 3 and len(text) > 100:
-        additional_cards = [
-            {
-                'title': 'Key Concept',
-                'question': 'What is the main topic discussed in this material?',
-                'answer': text[:200] + '...' if len(text) > 200 else text,
-                'difficulty': 'easy'
-            },
-            {
-                'title': 'Important Details',
-                'question': 'What are the important details mentioned in this study material?',
-                'answer': 'The material covers various important concepts that require careful study and understanding.',
-                'difficulty': 'medium'
-            }
-        ]
-        flashcards.extend(additional_cards)
-    
-    return flashcards[:5]  # Return max 5 flashcards
+    if len(flashcards) < 3:
+        prefix = read_prefix(text, 201)
+        if len(prefix) > 100:
+            flashcards.extend([
+                {
+                    'title': 'Key Concept',
+                    'question': 'What is the main topic discussed in this material?',
+                    'answer': prefix[:200] + '...' if len(prefix) > 200 else prefix,
+                    'difficulty': 'easy'
+                },
+                {
+                    'title': 'Important Details',
+                    'question': 'What are the important details mentioned in this study material?',
+                    'answer': 'The material covers various important concepts that require careful study and understanding.',
+                    'difficulty': 'medium'
+                }
+            ])
+    
+    return flashcards[:Config.OFFLINE_CARD_COUNT]
 
 def split_text_into_chunks(text, max_length=500):
     """
     Split text into manageable chunks for API processing
     """
-    words = text.split()
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for word in words:
-        if current_length + len(word) + 1 > max_length and current_chunk:
-            chunks.append(' '.join(current_chunk))
-            current_chunk = [word]
-            current_length = len(word)
-        else:
-            current_chunk.append(word)
-            current_length += len(word) + 1
-    
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    
-    return chunks
+    return list(iter_chunks(iter_sentences(text, max_length), max_length))
 
 def generate_questions_for_chunk(text):
     """
@@ -0,0 +1,282 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import wraps
+from flask import current_app, jsonify
+from flask_login import current_user
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+
+class HashingOverloaded(Exception):
+    """Raised when too many password hashes are already queued"""
+
+class ProcessHashPool:
+    """
+    Run password hashing on a small process pool, off the request threads
+    
+    At most `queue_limit` hashes may be queued or running at once; beyond that
+    callers get HashingOverloaded straight away instead of piling up behind a
+    CPU-bound queue.
+    """
+    
+    name = 'process'
+    
+    def __init__(self, workers, queue_limit):
+        context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self._slots = threading.BoundedSemaphore(queue_limit)
+    
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            return self._executor.submit(func, *args).result(timeout=Config.PASSWORD_HASH_TIMEOUT)
+        except TimeoutError:
+            raise HashingOverloaded()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next call
+            _reset_hash_pool(self)
+            raise HashingOverloaded()
+        finally:
+            self._slots.release()
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+class InlineHashPool:
+    """Hash on the calling thread, still bounded by the queue limit"""
+    
+    name = 'inline'
+    
+    def __init__(self, workers, queue_limit):
+        self._slots = threading.BoundedSemaphore(queue_limit)
+    
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            return func(*args)
+        finally:
+            self._slots.release()
+    
+    def shutdown(self):
+        pass
+
+HASH_POOL_BACKENDS = {
+    'process': ProcessHashPool,
+    'inline': InlineHashPool
+}
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+_hash_prefix = None
+
+def get_hash_pool():
+    """
+    Return the configured hashing pool, created once per process
+    """
+    global _hash_pool
+    
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                backend = HASH_POOL_BACKENDS.get(Config.PASSWORD_HASH_POOL)
+                if backend is None:
+                    raise ValueError(f"Unknown password hash pool: {Config.PASSWORD_HASH_POOL}")
+                _hash_pool = backend(Config.PASSWORD_HASH_WORKERS, Config.PASSWORD_HASH_QUEUE_LIMIT)
+    
+    return _hash_pool
+
+def _reset_hash_pool(pool):
+    global _hash_pool
+    
+    with _hash_pool_lock:
+        if _hash_pool is pool:
+            _hash_pool = None
+    pool.shutdown()
+
+def hash_password(password):
+    """Hash a password on the hashing pool, with PASSWORD_HASH_METHOD or werkzeug's default"""
+    if Config.PASSWORD_HASH_METHOD:
+        return get_hash_pool().run(generate_password_hash, password, Config.PASSWORD_HASH_METHOD)
+    return get_hash_pool().run(generate_password_hash, password)
+
+def verify_password(password_hash, password):
+    """Check a password against its stored hash on the hashing pool"""
+    return get_hash_pool().run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """
+    True if a stored hash was made with other parameters than PASSWORD_HASH_METHOD
+    
+    Werkzeug stores the fully expanded method (e.g. pbkdf2:sha256:600000) in
+    front of the salt, so the configured method is expanded once by hashing a
+    throwaway password and the prefixes are compared. Without a configured
+    method existing hashes are left alone.
+    """
+    global _hash_prefix
+    
+    if not Config.PASSWORD_HASH_METHOD:
+        return False
+    if _hash_prefix is None:
+        _hash_prefix = generate_password_hash('', Config.PASSWORD_HASH_METHOD).split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != _hash_prefix
+
+def admin_required(view):
+    """Answer 403 unless the logged-in user's email is in ADMIN_EMAILS (use under @login_required)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if (current_user.email or '').lower() not in current_app.config['ADMIN_EMAILS']:
+            return jsonify({'success': False, 'error': 'Forbidden'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+class SlidingWindowLimiter:
+    """
+    Count events per key over a sliding window, remembering at most max_keys keys
+    
+    The least recently seen keys are forgotten first, so a flood of distinct
+    keys cannot grow memory without bound.
+    """
+    
+    name = 'memory'
+    
+    def __init__(self, limit, window, max_keys=None, prefix=None):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys or Config.LOGIN_THROTTLE_MAX_KEYS
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _recent(self, key, now):
+        events = self._events.get(key)
+        if events is None:
+            return None
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        return events
+    
+    def blocked(self, key):
+        """True if key has used up its limit in the current window"""
+        if self.limit <= 0 or not key:
+            return False
+        with self._lock:
+            events = self._recent(key, time.monotonic())
+            return bool(events) and len(events) >= self.limit
+    
+    def hit(self, key):
+        """Record an event for key, returning False if it is now over the limit"""
+        if self.limit <= 0 or not key:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            events = self._recent(key, now)
+            if events is None:
+                events = self._events[key] = deque()
+                if len(self._events) > self.max_keys:
+                    self._events.popitem(last=False)
+            else:
+                self._events.move_to_end(key)
+            events.append(now)
+            return len(events) <= self.limit
+    
+    def reset(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+    
+    def retry_after(self, key):
+        """Seconds until key's oldest event in the window expires"""
+        with self._lock:
+            events = self._recent(key, time.monotonic())
+            if not events:
+                return 0
+            return max(1, int(events[0] + self.window - time.monotonic()) + 1)
+
+class RedisSlidingWindowLimiter:
+    """
+    Sliding window counts in Redis sorted sets, shared by every worker (needs the redis package)
+    
+    If Redis is unreachable requests are let through rather than locking
+    everyone out.
+    """
+    
+    name = 'redis'
+    
+    def __init__(self, limit, window, max_keys=None, prefix='login'):
+        import redis
+        
+        if not Config.LOGIN_THROTTLE_REDIS_URL:
+            raise ValueError("LOGIN_THROTTLE_REDIS_URL must be set for the redis login throttle")
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(Config.LOGIN_THROTTLE_REDIS_URL, socket_timeout=0.5)
+    
+    def _key(self, key):
+        return f'login-throttle:{self.prefix}:{key}'
+    
+    def _count(self, key, now, add=False):
+        pipeline = self._client.pipeline()
+        pipeline.zremrangebyscore(self._key(key), 0, now - self.window)
+        if add:
+            pipeline.zadd(self._key(key), {f'{now}:{uuid.uuid4().hex}': now})
+            pipeline.expire(self._key(key), int(self.window) + 1)
+        pipeline.zcard(self._key(key))
+        return pipeline.execute()[-1]
+    
+    def blocked(self, key):
+        """True if key has used up its limit in the current window"""
+        if self.limit <= 0 or not key:
+            return False
+        try:
+            return self._count(key, time.time()) >= self.limit
+        except Exception as e:
+            print(f"Login throttle read failed: {e}")
+            return False
+    
+    def hit(self, key):
+        """Record an event for key, returning False if it is now over the limit"""
+        if self.limit <= 0 or not key:
+            return True
+        try:
+            return self._count(key, time.time(), add=True) <= self.limit
+        except Exception as e:
+            print(f"Login throttle write failed: {e}")
+            return True
+    
+    def reset(self, key):
+        try:
+            self._client.delete(self._key(key))
+        except Exception as e:
+            print(f"Login throttle reset failed: {e}")
+    
+    def retry_after(self, key):
+        """Seconds until key's oldest event in the window expires"""
+        try:
+            oldest = self._client.zrange(self._key(key), 0, 0, withscores=True)
+        except Exception as e:
+            print(f"Login throttle read failed: {e}")
+            return 1
+        if not oldest:
+            return 0
+        return max(1, int(oldest[0][1] + self.window - time.time()) + 1)
+
+LOGIN_THROTTLE_BACKENDS = {
+    'memory': SlidingWindowLimiter,
+    'redis': RedisSlidingWindowLimiter
+}
+
+def make_login_limiter(prefix, limit):
+    """A login throttle on the configured LOGIN_THROTTLE_BACKEND"""
+    backend = LOGIN_THROTTLE_BACKENDS.get(Config.LOGIN_THROTTLE_BACKEND)
+    if backend is None:
+        raise ValueError(f"Unknown login throttle backend: {Config.LOGIN_THROTTLE_BACKEND}")
+    return backend(limit, Config.LOGIN_THROTTLE_WINDOW, prefix=prefix)
+
+# Every auth request counts against the client IP; only failed logins count against the email
+ip_limiter = make_login_limiter('ip', Config.LOGIN_IP_LIMIT)
+email_limiter = make_login_limiter('email', Config.LOGIN_EMAIL_LIMIT)
@@ -0,0 +1,113 @@
+from datetime import datetime
+from sqlalchemy import insert, text
+from sqlalchemy.exc import IntegrityError
+from config import Config
+from models import db, Flashcard
+
+# Flashcard columns callers may set through bulk_insert_flashcards
+FLASHCARD_FIELDS = (
+    'title', 'question', 'answer', 'difficulty', 'times_studied', 'correct_answers',
+    'ease_factor', 'interval_days', 'repetitions', 'due_at', 'last_reviewed_at', 'created_at'
+)
+
+def bulk_insert(model, rows, batch_size=None):
+    """
+    Insert many rows of a model with one statement per batch, returning the new ids
+    
+    Skips the ORM unit of work entirely. Where the dialect can return rows from
+    an executemany (SQLite, PostgreSQL, MariaDB) ids come back via RETURNING in
+    parameter order. MySQL has no RETURNING, so each batch is a single
+    multi-row INSERT and the ids are derived from lastrowid: InnoDB reserves
+    a "simple insert" one block of auto-increment values, spaced by
+    auto_increment_increment (more than 1 on Galera and multi-primary
+    setups). Runs inside the current transaction; the caller commits.
+    """
+    batch_size = batch_size or Config.BULK_INSERT_BATCH_SIZE
+    table = model.__table__
+    pk = table.primary_key.columns.values()[0]
+    dialect = db.session.get_bind().dialect
+    use_returning = dialect.insert_executemany_returning_sort_by_parameter_order
+    
+    step = 1
+    if not use_returning and dialect.name == 'mysql':
+        step = db.session.execute(text('SELECT @@SESSION.auto_increment_increment')).scalar() or 1
+    
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        
+        if use_returning:
+            result = db.session.execute(insert(table).returning(pk, sort_by_parameter_order=True), batch)
+            ids.extend(result.scalars().all())
+        else:
+            result = db.session.execute(insert(table).values(batch))
+            first_id = result.lastrowid
+            ids.extend(range(first_id, first_id + len(batch) * step, step))
+    
+    return ids
+
+def bulk_insert_flashcards(user_id, cards, job_id=None, batch_size=None):
+    """
+    Save card dicts (title, question, answer, difficulty, ...) for a user, returning their ids
+    
+    Fills in the same defaults as the Flashcard model so every row has the same
+    keys, which multi-row inserts require.
+    """
+    now = datetime.utcnow()
+    defaults = {
+        'difficulty': 'medium',
+        'times_studied': 0,
+        'correct_answers': 0,
+        'ease_factor': Config.SRS_INITIAL_EASE,
+        'interval_days': 0,
+        'repetitions': 0,
+        'due_at': now,
+        'last_reviewed_at': None,
+        'created_at': now
+    }
+    
+    rows = []
+    for card in cards:
+        row = dict(defaults, user_id=user_id, job_id=job_id)
+        row.update((field, card[field]) for field in FLASHCARD_FIELDS if card.get(field) is not None)
+        rows.append(row)
+    
+    return bulk_insert(Flashcard, rows, batch_size=batch_size)
+
+def insert_ignore(model, rows, batch_size=None):
+    """
+    Insert rows, silently skipping any that collide with a unique key
+    
+    Uses INSERT IGNORE on MySQL and ON CONFLICT DO NOTHING on SQLite and
+    PostgreSQL, so concurrent writers can race on the same keys without
+    errors. Other databases insert row by row, each in a savepoint that is
+    rolled back on an integrity error. Returns the number of rows actually
+    inserted.
+    """
+    batch_size = batch_size or Config.BULK_INSERT_BATCH_SIZE
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect == 'mysql':
+        statement = insert(table).prefix_with('IGNORE')
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table).on_conflict_do_nothing()
+    else:
+        inserted = 0
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table).values(row))
+                inserted += 1
+            except IntegrityError:
+                pass
+        return inserted
+    
+    inserted = 0
+    for start in range(0, len(rows), batch_size):
+        inserted += db.session.execute(statement, rows[start:start + batch_size]).rowcount
+    return inserted
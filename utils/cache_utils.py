@@ -0,0 +1,421 @@
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from config import Config
+from models import db, GenerationCache, User
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_text(text):
+    """
+    Normalize study text so trivially different pastes share a cache entry
+    """
+    text = unicodedata.normalize('NFC', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+class CacheStats:
+    """Hit/miss counters shared by all cache backends"""
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def record_evictions(self, count):
+        with self._lock:
+            self.evictions += count
+    
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+class MemoryFlashcardCache:
+    """In-process LRU cache with TTL and entry/byte size limits"""
+    
+    name = 'memory'
+    
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        
+        self.stats.record(entry is not None)
+        return json.loads(entry[0]) if entry is not None else None
+    
+    def set(self, key, flashcards):
+        payload = json.dumps(flashcards)
+        if len(payload) > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, time.monotonic() + self.ttl)
+            self._size += len(payload)
+            
+            evicted = 0
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        
+        if evicted:
+            self.stats.record_evictions(evicted)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def _remove(self, key):
+        payload, _ = self._entries.pop(key)
+        self._size -= len(payload)
+
+class SQLFlashcardCache:
+    """Cache backed by the generation_cache table, shared across workers"""
+    
+    name = 'sql'
+    
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+    
+    def get(self, key):
+        try:
+            entry = db.session.get(GenerationCache, key)
+        except Exception as e:
+            # Generate without the cache rather than failing the request
+            db.session.rollback()
+            print(f"Failed to read generation cache entry: {e}")
+            entry = None
+        if entry is not None and entry.expires_at < datetime.utcnow():
+            entry = None
+        
+        self.stats.record(entry is not None)
+        return json.loads(entry.payload) if entry is not None else None
+    
+    def set(self, key, flashcards):
+        payload = json.dumps(flashcards)
+        if len(payload) > self.max_bytes:
+            return
+        
+        now = datetime.utcnow()
+        try:
+            db.session.merge(GenerationCache(
+                cache_key=key,
+                payload=payload,
+                size_bytes=len(payload),
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.ttl)
+            ))
+            db.session.commit()
+            self._evict(now)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Failed to store generation cache entry: {e}")
+    
+    def clear(self):
+        GenerationCache.query.delete()
+        db.session.commit()
+    
+    def _evict(self, now):
+        evicted = GenerationCache.query.filter(GenerationCache.expires_at < now).delete(synchronize_session=False)
+        
+        entries, size = db.session.query(
+            db.func.count(GenerationCache.cache_key),
+            db.func.coalesce(db.func.sum(GenerationCache.size_bytes), 0)
+        ).one()
+        
+        # Drop the oldest entries until both the entry and byte limits hold
+        stale_keys = []
+        if entries > self.max_entries or size > self.max_bytes:
+            oldest = db.session.query(GenerationCache.cache_key, GenerationCache.size_bytes).order_by(
+                GenerationCache.created_at.asc()
+            )
+            for cache_key, size_bytes in oldest.yield_per(100):
+                if entries <= self.max_entries and size <= self.max_bytes:
+                    break
+                stale_keys.append(cache_key)
+                entries -= 1
+                size -= size_bytes
+        
+        if stale_keys:
+            evicted += GenerationCache.query.filter(
+                GenerationCache.cache_key.in_(stale_keys)
+            ).delete(synchronize_session=False)
+        
+        db.session.commit()
+        if evicted:
+            self.stats.record_evictions(evicted)
+
+class NullFlashcardCache:
+    """Cache backend used when caching is disabled"""
+    
+    name = 'none'
+    
+    def __init__(self, *args):
+        self.stats = CacheStats()
+    
+    def get(self, key):
+        return None
+    
+    def set(self, key, flashcards):
+        pass
+    
+    def clear(self):
+        pass
+
+CACHE_BACKENDS = {
+    'memory': MemoryFlashcardCache,
+    'sql': SQLFlashcardCache,
+    'none': NullFlashcardCache
+}
+
+_flashcard_cache = None
+_flashcard_cache_lock = threading.Lock()
+
+def get_flashcard_cache():
+    """
+    Return the configured flashcard cache backend, created once per process
+    """
+    global _flashcard_cache
+    
+    if _flashcard_cache is None:
+        with _flashcard_cache_lock:
+            if _flashcard_cache is None:
+                backend = CACHE_BACKENDS.get(Config.FLASHCARD_CACHE_BACKEND)
+                if backend is None:
+                    raise ValueError(f"Unknown flashcard cache backend: {Config.FLASHCARD_CACHE_BACKEND}")
+                _flashcard_cache = backend(
+                    Config.FLASHCARD_CACHE_TTL,
+                    Config.FLASHCARD_CACHE_MAX_ENTRIES,
+                    Config.FLASHCARD_CACHE_MAX_BYTES
+                )
+    
+    return _flashcard_cache
+
+
+# Fields Flask-Login and the templates read from current_user
+USER_CACHE_FIELDS = ('id', 'username', 'email', 'is_premium')
+
+class CachedUser(UserMixin):
+    """
+    A logged-in user's identity, served from the user cache
+    
+    Only carries USER_CACHE_FIELDS; load the User row when anything else is needed.
+    """
+    
+    def __init__(self, id, username, email, is_premium):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.is_premium = bool(is_premium)
+    
+    def __repr__(self):
+        return f'<User {self.username}>'
+
+class MemoryUserCache:
+    """In-process LRU of user identities with a TTL"""
+    
+    name = 'memory'
+    
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[user_id]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+        
+        self.stats.record(entry is not None)
+        return entry[0] if entry is not None else None
+    
+    def set(self, user_id, fields):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (fields, time.monotonic() + self.ttl)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        
+        if evicted:
+            self.stats.record_evictions(evicted)
+    
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisUserCache:
+    """User identities in Redis, shared by every worker (needs the redis package)"""
+    
+    name = 'redis'
+    
+    def __init__(self, ttl, max_entries):
+        import redis
+        
+        if not Config.USER_CACHE_REDIS_URL:
+            raise ValueError("USER_CACHE_REDIS_URL must be set for the redis user cache")
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._client = redis.Redis.from_url(Config.USER_CACHE_REDIS_URL, socket_timeout=0.5)
+    
+    def _key(self, user_id):
+        return f'user-cache:{user_id}'
+    
+    def get(self, user_id):
+        try:
+            payload = self._client.get(self._key(user_id))
+        except Exception as e:
+            print(f"User cache read failed: {e}")
+            payload = None
+        
+        self.stats.record(payload is not None)
+        return json.loads(payload) if payload is not None else None
+    
+    def set(self, user_id, fields):
+        try:
+            self._client.setex(self._key(user_id), self.ttl, json.dumps(fields))
+        except Exception as e:
+            print(f"User cache write failed: {e}")
+    
+    def delete(self, user_id):
+        try:
+            self._client.delete(self._key(user_id))
+        except Exception as e:
+            print(f"User cache invalidation failed: {e}")
+    
+    def clear(self):
+        for key in self._client.scan_iter('user-cache:*'):
+            self._client.delete(key)
+
+class NullUserCache:
+    """User cache backend used when caching is disabled"""
+    
+    name = 'none'
+    
+    def __init__(self, *args):
+        self.stats = CacheStats()
+    
+    def get(self, user_id):
+        return None
+    
+    def set(self, user_id, fields):
+        pass
+    
+    def delete(self, user_id):
+        pass
+    
+    def clear(self):
+        pass
+
+USER_CACHE_BACKENDS = {
+    'memory': MemoryUserCache,
+    'redis': RedisUserCache,
+    'none': NullUserCache
+}
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+def get_user_cache():
+    """
+    Return the configured user cache backend, created once per process
+    """
+    global _user_cache
+    
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                backend = USER_CACHE_BACKENDS.get(Config.USER_CACHE_BACKEND)
+                if backend is None:
+                    raise ValueError(f"Unknown user cache backend: {Config.USER_CACHE_BACKEND}")
+                _user_cache = backend(Config.USER_CACHE_TTL, Config.USER_CACHE_MAX_ENTRIES)
+    
+    return _user_cache
+
+def load_cached_user(user_id):
+    """
+    Flask-Login user loader that only queries the users table on a cache miss
+    """
+    cache = get_user_cache()
+    fields = cache.get(user_id)
+    if fields is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        fields = {name: getattr(user, name) for name in USER_CACHE_FIELDS}
+        cache.set(user_id, fields)
+    return CachedUser(**fields)
+
+def invalidate_user(user_id):
+    """Drop a user from the cache; call after changing users with a bulk UPDATE"""
+    get_user_cache().delete(user_id)
+
+# ORM changes to cached fields invalidate the entry once the transaction commits,
+# so a concurrent request cannot re-cache the old row between flush and commit
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in USER_CACHE_FIELDS):
+        state.session.info.setdefault('stale_user_ids', set()).add(target.id)
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    inspect(target).session.info.setdefault('stale_user_ids', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop('stale_user_ids', ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_users(session):
+    session.info.pop('stale_user_ids', None)
@@ -0,0 +1,216 @@
+import random
+import threading
+import time
+from functools import wraps
+from flask import g, has_app_context, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import Select, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from config import Config
+
+# Bind keys of the read replicas in SQLALCHEMY_BINDS
+REPLICA_BIND_PREFIX = 'replica_'
+
+class PoolMetrics:
+    """Checkout, wait and connection counters for one connection pool"""
+    
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+    
+    def record_checkout(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+    
+    def record(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def as_dict(self):
+        waits = self.checkouts + self.timeouts
+        return {
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'connects': self.connects,
+            'invalidations': self.invalidations,
+            'timeouts': self.timeouts,
+            'wait_avg_ms': round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+            'wait_max_ms': round(self.wait_max * 1000, 3)
+        }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return record
+    
+    def _do_return_conn(self, record):
+        self.metrics.record('checkins')
+        super()._do_return_conn(record)
+    
+    def _create_connection(self):
+        self.metrics.record('connects')
+        return super()._create_connection()
+    
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting across it
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+def build_engine_options(config, uri=None):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database (or another URI)
+    
+    Pool sizing, recycling and the MySQL session settings only apply to MySQL;
+    other databases (SQLite in tests and benchmarks) keep Flask-SQLAlchemy's
+    defaults.
+    """
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'mysql':
+        return {}
+    
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'connect_args': {'connect_timeout': config['DB_CONNECT_TIMEOUT']}
+    }
+    if config['DB_ISOLATION_LEVEL']:
+        options['isolation_level'] = config['DB_ISOLATION_LEVEL']
+    
+    session_settings = []
+    if config['DB_STATEMENT_TIMEOUT_MS']:
+        # Caps SELECTs only; MySQL has no server-side limit for writes
+        session_settings.append(f"max_execution_time = {int(config['DB_STATEMENT_TIMEOUT_MS'])}")
+    if config['DB_WAIT_TIMEOUT']:
+        session_settings.append(f"wait_timeout = {int(config['DB_WAIT_TIMEOUT'])}")
+    if session_settings:
+        options['connect_args']['init_command'] = 'SET SESSION ' + ', '.join(session_settings)
+    
+    return options
+
+def build_replica_binds(config):
+    """SQLALCHEMY_BINDS entries for SQLALCHEMY_REPLICA_URIS, with the same pool settings as the primary"""
+    return {
+        f'{REPLICA_BIND_PREFIX}{index}': {'url': uri, **build_engine_options(config, uri)}
+        for index, uri in enumerate(config.get('SQLALCHEMY_REPLICA_URIS') or [])
+    }
+
+def read_replica(view):
+    """
+    Let a view's plain SELECTs go to a read replica
+    
+    Writes, SELECT ... FOR UPDATE, raw SQL and any read after this request
+    has written stay on the primary, as do all queries for
+    DB_REPLICA_STICKY_SECONDS after the user's last committed write.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+class RoutingSession(FlaskSession):
+    """Session that sends reads from @read_replica views to a replica engine"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['db_wrote'] = True
+            elif self._reads_from_replica(clause):
+                replica = self._replica_engine()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+    
+    def _reads_from_replica(self, clause):
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:
+            return False
+        if not has_app_context() or not g.get('db_read_replica') or self.info.get('db_wrote'):
+            return False
+        if has_request_context() and flask_session.get('db_primary_until', 0) > time.time():
+            return False
+        return True
+    
+    def _replica_engine(self):
+        # One replica per session, so a request sees a single consistent snapshot
+        engines = self._db.engines
+        key = self.info.get('db_replica')
+        if key is None:
+            keys = [name for name in engines if name and name.startswith(REPLICA_BIND_PREFIX)]
+            if not keys:
+                return None
+            key = self.info['db_replica'] = random.choice(keys)
+        return engines[key]
+
+def pin_to_primary(seconds=0):
+    """
+    Keep the current user's reads on the primary for `seconds` plus DB_REPLICA_STICKY_SECONDS
+    
+    Commits pin the user automatically, but only while the response has not
+    started: call this up front for writes that happen later, inside a
+    streamed response or in a background job. A longer existing pin is kept.
+    """
+    if has_request_context() and Config.SQLALCHEMY_REPLICA_URIS:
+        until = time.time() + seconds + Config.DB_REPLICA_STICKY_SECONDS
+        if until > flask_session.get('db_primary_until', 0):
+            flask_session['db_primary_until'] = until
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(session):
+    """Keep the user on the primary for a few seconds after a write, so replica lag cannot hide it"""
+    if session.info.get('db_wrote'):
+        pin_to_primary()
+
+def init_pool_metrics(engine):
+    """Count invalidated connections (e.g. stale ones caught by pre-ping) on the engine's pool"""
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics = getattr(engine.pool, 'metrics', None)
+        if metrics is not None:
+            metrics.record('invalidations')
+
+def get_pool_stats(engine):
+    """Current pool occupancy plus the cumulative checkout metrics"""
+    pool = engine.pool
+    stats = {'pool': pool.__class__.__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow()
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        stats.update(metrics.as_dict())
+    return stats
@@ -0,0 +1,189 @@
+import csv
+import io
+import json
+from config import Config
+from models import db, Flashcard
+from utils.bulk_utils import bulk_insert_flashcards
+
+# Columns written by the CSV and JSON Lines exports
+EXPORT_COLUMNS = (
+    'title', 'question', 'answer', 'difficulty', 'times_studied', 'correct_answers',
+    'ease_factor', 'interval_days', 'repetitions', 'due_at', 'created_at'
+)
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Header names accepted on import, mapped to Flashcard fields
+IMPORT_ALIASES = {
+    'title': 'title',
+    'question': 'question',
+    'front': 'question',
+    'answer': 'answer',
+    'back': 'answer',
+    'difficulty': 'difficulty',
+    'tags': 'tags'
+}
+
+# Anki's "Notes in Plain Text" format: tab separated, with file headers
+ANKI_HEADER = '#separator:tab\n#html:false\n#columns:Front\tBack\tTags\n'
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'anki': ('text/tab-separated-values', 'txt')
+}
+
+EXTENSION_FORMATS = {
+    'csv': 'csv',
+    'jsonl': 'jsonl',
+    'ndjson': 'jsonl',
+    'txt': 'anki',
+    'tsv': 'anki'
+}
+
+def iter_deck_rows(user_id):
+    """
+    Stream a user's cards as tuples in EXPORT_COLUMNS order
+    
+    Uses yield_per so only one batch of rows is held at a time, however large the deck.
+    """
+    columns = [getattr(Flashcard, name) for name in EXPORT_COLUMNS]
+    query = db.session.query(*columns).filter(Flashcard.user_id == user_id).order_by(Flashcard.id)
+    for row in query.yield_per(Config.EXPORT_BATCH_SIZE):
+        yield tuple(value.isoformat() if hasattr(value, 'isoformat') else value for value in row)
+
+def _csv_line(writer, buffer, values):
+    writer.writerow(values)
+    line = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return line
+
+def iter_export(user_id, fmt):
+    """Yield an export of a user's deck in the given format, a chunk of rows at a time"""
+    buffer = io.StringIO()
+    
+    if fmt == 'jsonl':
+        encode = lambda row: json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+        header = ''
+    elif fmt == 'anki':
+        writer = csv.writer(buffer, delimiter='\t', lineterminator='\n')
+        question, answer, difficulty = (EXPORT_COLUMNS.index(name) for name in ('question', 'answer', 'difficulty'))
+        encode = lambda row: _csv_line(writer, buffer, (row[question], row[answer], row[difficulty] or ''))
+        header = ANKI_HEADER
+    else:
+        writer = csv.writer(buffer, lineterminator='\n')
+        encode = lambda row: _csv_line(writer, buffer, row)
+        header = _csv_line(writer, buffer, EXPORT_COLUMNS)
+    
+    chunk = [header]
+    for row in iter_deck_rows(user_id):
+        chunk.append(encode(row))
+        if len(chunk) >= Config.EXPORT_BATCH_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    
+    if chunk:
+        yield ''.join(chunk)
+
+def detect_import_format(filename, requested=None):
+    """Pick the import format from an explicit choice or the file extension"""
+    if requested:
+        return requested if requested in EXPORT_FORMATS else None
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return EXTENSION_FORMATS.get(extension)
+
+def _normalize_record(record):
+    """Map an imported record onto Flashcard fields, or return None if it has no question/answer"""
+    fields = {}
+    for key, value in record.items():
+        field = IMPORT_ALIASES.get(str(key).strip().lower())
+        if field and value is not None and field not in fields:
+            fields[field] = str(value).strip()
+    
+    if not fields.get('question') or not fields.get('answer'):
+        return None
+    
+    difficulty = fields.get('difficulty', '').lower()
+    if difficulty not in DIFFICULTIES:
+        # Anki tags may carry the difficulty among other tags
+        tags = fields.get('tags', '').lower().split()
+        difficulty = next((tag for tag in tags if tag in DIFFICULTIES), 'medium')
+    
+    return {
+        'title': (fields.get('title') or fields['question'])[:200],
+        'question': fields['question'],
+        'answer': fields['answer'],
+        'difficulty': difficulty
+    }
+
+def iter_import_records(stream, fmt):
+    """
+    Parse an uploaded deck line by line, yielding raw dict records
+    
+    `stream` is a binary file object; it is decoded incrementally, so the
+    whole file is never read into memory.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    
+    if fmt == 'jsonl':
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield {}
+                continue
+            yield record if isinstance(record, dict) else {}
+    elif fmt == 'anki':
+        columns = ['front', 'back', 'tags']
+        
+        def lines():
+            for line in text:
+                if line.startswith('#'):
+                    # File headers, e.g. "#columns:Front<TAB>Back<TAB>Tags"
+                    if line.lower().startswith('#columns:'):
+                        columns[:] = [name.strip().lower() for name in line[9:].split('\t')]
+                    continue
+                yield line
+        
+        for values in csv.reader(lines(), delimiter='\t'):
+            if values:
+                yield dict(zip(columns, values))
+    else:
+        for record in csv.DictReader(text):
+            yield record
+
+def import_deck(user_id, stream, fmt):
+    """
+    Import cards from an uploaded deck in chunked bulk inserts
+    
+    Rows without a question and answer are skipped. The import runs in a
+    single transaction, so a failure part way leaves the deck untouched.
+    Returns (imported, skipped).
+    """
+    imported = skipped = 0
+    batch = []
+    
+    try:
+        for record in iter_import_records(stream, fmt):
+            card = _normalize_record(record)
+            if card is None:
+                skipped += 1
+                continue
+            
+            batch.append(card)
+            if len(batch) >= Config.BULK_INSERT_BATCH_SIZE:
+                imported += len(bulk_insert_flashcards(user_id, batch))
+                batch = []
+        
+        if batch:
+            imported += len(bulk_insert_flashcards(user_id, batch))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return imported, skipped
@@ -1,170 +1,294 @@
 from flask_mail import Mail, Message
 from flask import current_app
+import os
+import queue
+import random
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import escape
 from config import Config
 
 mail = Mail()
 
+# Email bodies live in templates/emails as <kind>.html and <kind>.txt
+EMAIL_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'emails')
+
+EMAIL_TEMPLATES = {
+    'suggestion_confirmation': {
+        'subject': 'Thank you for your suggestion! - AI Study Buddy',
+        'fields': ('username',)
+    },
+    'welcome': {
+        'subject': 'Welcome to AI Study Buddy! 🧠',
+        'fields': ('username',)
+    }
+}
+
+# Stands in for per-recipient fields while a template is compiled
+FIELD_MARKER = '\x00'
+
+_email_env = Environment(
+    loader=FileSystemLoader(EMAIL_TEMPLATE_DIR),
+    autoescape=select_autoescape(['html']),
+    auto_reload=False,
+    keep_trailing_newline=True
+)
+
 def init_mail(app):
     """Initialize Flask-Mail with the app"""
     mail.init_app(app)
 
-def send_bulk_confirmation_emails(users):
+class RateLimiter:
+    """Token bucket shared by the sending threads; a rate of 0 means unlimited"""
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = max(rate, 1)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(max(self.rate, 1), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def is_connection_error(error):
+    """True when the SMTP connection itself is gone (SMTPException subclasses OSError, so check both)"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+def is_transient_error(error):
+    """True for SMTP failures worth retrying: 4xx replies and dropped connections"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return is_connection_error(error)
+
+def _close_connection(connection):
+    """Quit an SMTP connection, dropping it if the server already hung up"""
+    if connection is None or connection.host is None:
+        return
+    try:
+        connection.host.quit()
+    except Exception:
+        connection.host.close()
+
+def send_bulk_mail(app, recipients, build_message, connections=None, rate=None, max_retries=None, on_result=None):
     """
-    Send confirmation emails to all users who submitted suggestions
+    Send one message per recipient over a few persistent SMTP connections
+    
+    Each of `connections` threads opens a single Flask-Mail connection and
+    sends over it until the work runs out (Flask-Mail reconnects every
+    MAIL_MAX_EMAILS messages). Sends are throttled by a shared rate limit.
+    Transient failures are retried with exponential backoff and jitter, on a
+    fresh connection if the old one dropped. Messages are built lazily by
+    `build_message(recipient)` so memory does not grow with the list.
+    
+    Returns per-recipient results in input order, as dicts with recipient,
+    status ('sent' or 'failed'), attempts and error. `on_result`, if given,
+    is called with each result as soon as it is known, on the sending thread
+    inside an app context.
     """
-    success_count = 0
+    connections = connections or Config.MAIL_BULK_CONNECTIONS
+    max_retries = Config.MAIL_MAX_RETRIES if max_retries is None else max_retries
+    limiter = RateLimiter(Config.MAIL_RATE_LIMIT if rate is None else rate)
     
-    try:
-        # Use Flask-Mail if configured
-        if Config.MAIL_USERNAME and Config.MAIL_PASSWORD:
-            success_count = send_with_flask_mail(users)
-        else:
-            # Fallback to mock email sending for demo
-            success_count = send_mock_emails(users)
-            
-    except Exception as e:
-        print(f"Error sending bulk emails: {e}")
-        # Try mock email as fallback
-        success_count = send_mock_emails(users)
-    
-    return success_count
-
-def send_with_flask_mail(users):
-    """Send emails using Flask-Mail"""
-    success_count = 0
-    
-    for user in users:
-        try:
-            msg = Message(
-                subject='Thank you for your suggestion! - AI Study Buddy',
-                sender=Config.MAIL_DEFAULT_SENDER,
-                recipients=[user.email]
-            )
-            
-            msg.html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                    .header {{ background: linear-gradient(135deg, #3B82F6, #8B5CF6); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                    .content {{ background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; }}
-                    .footer {{ text-align: center; margin-top: 20px; color: #666; font-size: 14px; }}
-                    .btn {{ display: inline-block; background: #3B82F6; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; margin: 10px 0; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🧠 AI Study Buddy</h1>
-                        <p>Thank you for your valuable feedback!</p>
-                    </div>
-                    <div class="content">
-                        <h2>Hello {user.username}!</h2>
-                        <p>We've received your suggestion and really appreciate your feedback. Your input helps us improve AI Study Buddy for students across Africa.</p>
-                        
-                        <p><strong>What happens next?</strong></p>
-                        <ul>
-                            <li>Our team will review your suggestion carefully</li>
-                            <li>We'll consider implementing it in future updates</li>
-                            <li>You'll be notified of any major feature releases</li>
-                        </ul>
-                        
-                        <p>Keep studying smart with AI Study Buddy! 📚</p>
-                        
-                        <a href="#" class="btn">Continue Studying</a>
-                    </div>
-                    <div class="footer">
-                        <p>AI Study Buddy - Empowering African Students with AI Technology</p>
-                        <p>SDG 4: Quality Education | Vibe Coding 3.0 Hackathon</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            mail.send(msg)
-            success_count += 1
-            print(f"Email sent successfully to {user.email}")
-            
-        except Exception as e:
-            print(f"Failed to send email to {user.email}: {e}")
-            continue
-    
-    return success_count
-
-def send_mock_emails(users):
+    work = queue.Queue()
+    for index, recipient in enumerate(recipients):
+        work.put((index, recipient))
+    results = [None] * work.qsize()
+    
+    def worker():
+        with app.app_context():
+            connection = None
+            try:
+                while True:
+                    try:
+                        index, recipient = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    
+                    attempts = 0
+                    error = None
+                    while True:
+                        attempts += 1
+                        limiter.acquire()
+                        try:
+                            if connection is None:
+                                connection = mail.connect().__enter__()
+                            connection.send(build_message(recipient))
+                            error = None
+                            break
+                        except Exception as e:
+                            error = e
+                            if is_connection_error(e):
+                                _close_connection(connection)
+                                connection = None
+                            if not is_transient_error(e) or attempts > max_retries:
+                                break
+                            time.sleep(Config.MAIL_RETRY_BACKOFF * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5))
+                    
+                    results[index] = {
+                        'recipient': recipient,
+                        'status': 'failed' if error else 'sent',
+                        'attempts': attempts,
+                        'error': str(error) if error else None
+                    }
+                    if on_result:
+                        on_result(results[index])
+            finally:
+                _close_connection(connection)
+    
+    threads = [
+        threading.Thread(target=worker, name=f'bulk-mail-{n}', daemon=True)
+        for n in range(min(connections, len(results)))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    return results
+
+def summarize_mail_results(results):
+    """Sent and failed counts for a list of send_bulk_mail results"""
+    sent = sum(1 for result in results if result['status'] == 'sent')
+    return {'sent': sent, 'failed': len(results) - sent}
+
+def deliver_emails(app, recipients, on_result=None):
+    """
+    Send queued emails, each rendered from the templates for its kind
+    
+    `recipients` are dicts with kind, email and the template fields.
+    Returns per-recipient results as produced by send_bulk_mail.
+    """
+    # Use Flask-Mail if configured
+    if Config.MAIL_ENABLED:
+        return send_bulk_mail(app, recipients, build_message, on_result=on_result)
+    # Fallback to mock email sending for demo
+    return send_mock_emails(recipients, on_result=on_result)
+
+class CompiledEmail:
+    """
+    An email kind rendered through Jinja once, leaving slots for the per-recipient fields
+    
+    The HTML and text templates are rendered with a marker in place of each
+    field and split into static parts, so rendering for a recipient is just
+    filling the slots with the (escaped) field values and joining. Per-recipient
+    fields must therefore be plain substitutions, not used in template logic.
+    """
+    
+    def __init__(self, kind):
+        spec = EMAIL_TEMPLATES[kind]
+        self.kind = kind
+        self.subject = spec['subject']
+        self.fields = spec['fields']
+        
+        markers = {field: f'{FIELD_MARKER}{field}{FIELD_MARKER}' for field in self.fields}
+        self.html = self._compile(_email_env.get_template(f'{kind}.html').render(subject=self.subject, **markers))
+        self.text = self._compile(_email_env.get_template(f'{kind}.txt').render(subject=self.subject, **markers))
+    
+    @staticmethod
+    def _compile(rendered):
+        """Split a rendered template into (parts, slots); odd parts are field names"""
+        parts = rendered.split(FIELD_MARKER)
+        slots = [(i, parts[i]) for i in range(1, len(parts), 2)]
+        return parts, slots
+    
+    @staticmethod
+    def _fill(compiled, values):
+        parts, slots = compiled
+        parts = parts.copy()
+        for i, field in slots:
+            parts[i] = values[field]
+        return ''.join(parts)
+    
+    def render(self, recipient):
+        """Return (subject, html, text) for one recipient"""
+        values = {field: str(recipient.get(field) or '') for field in self.fields}
+        escaped = {field: str(escape(value)) for field, value in values.items()}
+        return self.subject, self._fill(self.html, escaped), self._fill(self.text, values)
+
+_compiled_emails = {}
+_compiled_emails_lock = threading.Lock()
+
+def get_compiled_email(kind):
+    """The CompiledEmail for a kind, built on first use and cached for the process"""
+    compiled = _compiled_emails.get(kind)
+    if compiled is None:
+        with _compiled_emails_lock:
+            compiled = _compiled_emails.get(kind)
+            if compiled is None:
+                compiled = _compiled_emails[kind] = CompiledEmail(kind)
+    return compiled
+
+def render_emails(kind, recipients):
+    """Render (subject, html, text) for many recipients of one kind, compiling the templates once"""
+    compiled = get_compiled_email(kind)
+    return [compiled.render(recipient) for recipient in recipients]
+
+def build_message(recipient):
+    """Build the Flask-Mail message for a queued recipient according to its kind"""
+    subject, html, text = get_compiled_email(recipient['kind']).render(recipient)
+    return Message(
+        subject=subject,
+        sender=Config.MAIL_DEFAULT_SENDER,
+        recipients=[recipient['email']],
+        body=text,
+        html=html
+    )
+
+def send_mock_emails(recipients, on_result=None):
     """Mock email sending for demo purposes"""
     print("=== MOCK EMAIL SYSTEM ===")
-    print("Sending bulk confirmation emails...")
+    print("Sending queued emails...")
     
-    for user in users:
+    results = []
+    for recipient in recipients:
         print(f"""
-        📧 EMAIL SENT TO: {user.email}
-        👤 RECIPIENT: {user.username}
-        📋 SUBJECT: Thank you for your suggestion! - AI Study Buddy
+        📧 EMAIL SENT TO: {recipient['email']}
+        👤 RECIPIENT: {recipient['username']}
+        📋 SUBJECT: {get_compiled_email(recipient['kind']).subject}
         ✅ STATUS: Delivered
         """)
+        result = {'recipient': recipient, 'status': 'sent', 'attempts': 1, 'error': None}
+        results.append(result)
+        if on_result:
+            on_result(result)
     
-    print(f"✅ Successfully sent {len(users)} confirmation emails!")
+    print(f"✅ Successfully sent {len(recipients)} emails!")
     print("=== END MOCK EMAIL SYSTEM ===")
     
-    return len(users)
+    return results
 
 def send_welcome_email(user):
-    """Send welcome email to new users"""
+    """Queue a welcome email for a new user"""
+    from utils.outbox_utils import enqueue_emails
+    
     try:
-        if Config.MAIL_USERNAME and Config.MAIL_PASSWORD:
-            msg = Message(
-                subject='Welcome to AI Study Buddy! 🧠',
-                sender=Config.MAIL_DEFAULT_SENDER,
-                recipients=[user.email]
-            )
-            
-            msg.html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                    .header {{ background: linear-gradient(135deg, #3B82F6, #8B5CF6); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                    .content {{ background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🧠 Welcome to AI Study Buddy!</h1>
-                    </div>
-                    <div class="content">
-                        <h2>Hello {user.username}!</h2>
-                        <p>Welcome to AI Study Buddy - your intelligent companion for smarter studying!</p>
-                        
-                        <p><strong>Get started:</strong></p>
-                        <ul>
-                            <li>📝 Paste your study notes to generate flashcards</li>
-                            <li>🎯 Study with interactive flip cards</li>
-                            <li>💡 Share suggestions to help us improve</li>
-                        </ul>
-                        
-                        <p>Happy studying! 📚</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            mail.send(msg)
-            return True
-        else:
-            print(f"Mock welcome email sent to {user.email}")
-            return True
-            
+        enqueue_emails([{
+            'kind': 'welcome',
+            'key': f'welcome:{user.id}',
+            'email': user.email,
+            'context': {'username': user.username}
+        }])
+        return True
     except Exception as e:
-        print(f"Failed to send welcome email: {e}")
-        return False
\ No newline at end of file
+        print(f"Failed to queue welcome email: {e}")
+        return False
@@ -0,0 +1,177 @@
+import codecs
+import hashlib
+import heapq
+import re
+from config import Config
+
+BLOCK_SIZE = 64 * 1024
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_CUE_WORDS = {
+    'definition', 'define', 'defined', 'meaning', 'process', 'steps', 'procedure',
+    'cause', 'causes', 'effect', 'result', 'results', 'because', 'therefore', 'important'
+}
+
+def iter_text_blocks(source, block_size=BLOCK_SIZE):
+    """
+    Yield the study material in bounded blocks from a string or file object
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), block_size):
+            yield source[start:start + block_size]
+        return
+    
+    if source.seekable():
+        source.seek(0)
+    
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        yield block if isinstance(block, str) else decoder.decode(block)
+    
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def iter_sentences(source, max_length=None):
+    """
+    Yield whitespace-normalized sentences without loading the whole source
+    
+    Runs of text with no sentence punctuation are cut at max_length so a
+    single huge "sentence" cannot grow the buffer without bound.
+    """
+    max_length = max_length or Config.CHUNK_MAX_LENGTH
+    buffer = ''
+    
+    for block in iter_text_blocks(source):
+        buffer += block
+        parts = _SENTENCE_END_RE.split(buffer)
+        buffer = parts.pop()
+        
+        for part in parts:
+            yield from _split_long_sentence(part, max_length)
+        
+        while len(buffer) > max_length * 2:
+            cut = buffer.rfind(' ', 0, max_length)
+            cut = cut if cut > 0 else max_length
+            yield from _split_long_sentence(buffer[:cut], max_length)
+            buffer = buffer[cut:]
+    
+    yield from _split_long_sentence(buffer, max_length)
+
+def _split_long_sentence(sentence, max_length):
+    sentence = _WHITESPACE_RE.sub(' ', sentence).strip()
+    
+    while len(sentence) > max_length:
+        cut = sentence.rfind(' ', 0, max_length)
+        cut = cut if cut > 0 else max_length
+        yield sentence[:cut].strip()
+        sentence = sentence[cut:].strip()
+    
+    if sentence:
+        yield sentence
+
+def iter_chunks(sentences, max_length=None, overlap=None):
+    """
+    Group sentences into chunks of up to max_length characters
+    
+    The last `overlap` sentences of each chunk are repeated at the start of
+    the next one so answers spanning a chunk boundary are not lost.
+    """
+    max_length = max_length or Config.CHUNK_MAX_LENGTH
+    overlap = Config.CHUNK_OVERLAP_SENTENCES if overlap is None else overlap
+    current = []
+    current_length = 0
+    fresh = 0
+    
+    for sentence in sentences:
+        if current and current_length + len(sentence) + 1 > max_length:
+            yield ' '.join(current)
+            current = current[-overlap:] if overlap else []
+            current_length = sum(len(s) + 1 for s in current)
+            fresh = 0
+            
+            # Drop overlap that would not leave room for the new sentence
+            while current and current_length + len(sentence) + 1 > max_length:
+                current_length -= len(current.pop(0)) + 1
+        
+        current.append(sentence)
+        current_length += len(sentence) + 1
+        fresh += 1
+    
+    if current and fresh:
+        yield ' '.join(current)
+
+def score_chunk(chunk):
+    """
+    Rough informativeness score: vocabulary richness plus explanatory cue words
+    """
+    words = _WORD_RE.findall(chunk.lower())
+    content_words = [word for word in words if len(word) > 4]
+    if not content_words:
+        return 0.1
+    
+    richness = len(set(content_words)) / len(words)
+    cues = sum(1 for word in words if word in _CUE_WORDS)
+    return richness * len(content_words) ** 0.5 + cues
+
+def select_chunks(chunks, budget):
+    """
+    Pick up to `budget` chunks spread over the whole document, favouring
+    informative ones, while holding at most `budget` chunks in memory
+    
+    Uses weighted reservoir sampling (Efraimidis-Spirakis). The random draw
+    for each chunk comes from a hash of its text, so the same document always
+    yields the same selection and benefits from the answer memo.
+    """
+    reservoir = []
+    
+    for position, chunk in enumerate(chunks):
+        digest = hashlib.blake2b(chunk.encode('utf-8'), digest_size=8).digest()
+        draw = (int.from_bytes(digest, 'big') + 1) / (2 ** 64 + 1)
+        key = draw ** (1.0 / max(score_chunk(chunk), 1e-6))
+        
+        entry = (key, position, chunk)
+        if len(reservoir) < budget:
+            heapq.heappush(reservoir, entry)
+        elif key > reservoir[0][0]:
+            heapq.heapreplace(reservoir, entry)
+    
+    # Hand chunks back in document order
+    return [chunk for _, _, chunk in sorted(reservoir, key=lambda entry: entry[1])]
+
+def iter_document_chunks(source):
+    """Stream a document through sentence splitting and chunking"""
+    return iter_chunks(iter_sentences(source))
+
+def hash_document(source, model):
+    """
+    Content hash of a document's normalized sentences, computed in one streaming pass
+    """
+    digest = hashlib.sha256()
+    digest.update(model.encode('utf-8'))
+    digest.update(b'\0')
+    
+    for sentence in iter_sentences(source):
+        digest.update(sentence.encode('utf-8'))
+        digest.update(b' ')
+    
+    return digest.hexdigest()
+
+def read_prefix(source, limit):
+    """Return at most `limit` characters from the start of the document"""
+    if isinstance(source, str):
+        return source[:limit]
+    
+    parts = []
+    size = 0
+    for block in iter_text_blocks(source):
+        parts.append(block[:limit - size])
+        size += len(parts[-1])
+        if size >= limit:
+            break
+    
+    return ''.join(parts)
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import Config
+from models import db, GenerationJob
+from utils.ai_utils import iter_flashcards_from_text
+from utils.bulk_utils import bulk_insert_flashcards
+
+class ThreadJobQueue:
+    """Run jobs on a bounded in-process thread pool"""
+    
+    name = 'thread'
+    
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='flashcard-job')
+    
+    def submit(self, func, *args):
+        self._executor.submit(func, *args)
+
+class InlineJobQueue:
+    """Run jobs synchronously in the caller, for debugging and scripts"""
+    
+    name = 'inline'
+    
+    def __init__(self, max_workers=None):
+        pass
+    
+    def submit(self, func, *args):
+        func(*args)
+
+JOB_QUEUE_BACKENDS = {
+    'thread': ThreadJobQueue,
+    'inline': InlineJobQueue
+}
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """
+    Return the configured job queue backend, created once per process
+    """
+    global _job_queue
+    
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                backend = JOB_QUEUE_BACKENDS.get(Config.JOB_QUEUE_BACKEND)
+                if backend is None:
+                    raise ValueError(f"Unknown job queue backend: {Config.JOB_QUEUE_BACKEND}")
+                _job_queue = backend(Config.JOB_QUEUE_WORKERS)
+    
+    return _job_queue
+
+def enqueue_generation_job(app, user_id, text):
+    """
+    Record a flashcard generation job and queue it, returning the job
+    
+    Uploaded files are copied to a temporary file first, since the request's
+    upload is gone by the time a worker picks the job up.
+    """
+    upload_path = None
+    if not isinstance(text, str):
+        with tempfile.NamedTemporaryFile(prefix='flashcard-job-', delete=False) as f:
+            text.seek(0)
+            shutil.copyfileobj(text, f)
+            upload_path = f.name
+        text = None
+    
+    job = GenerationJob(id=uuid.uuid4().hex, user_id=user_id, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    
+    get_job_queue().submit(run_generation_job, app, job.id, user_id, text, upload_path)
+    return job
+
+def run_generation_job(app, job_id, user_id, text, upload_path=None):
+    """
+    Generate flashcards for a job, saving each card as soon as it is produced
+    """
+    try:
+        if upload_path:
+            with open(upload_path, 'rb') as upload:
+                _run_generation_job(app, job_id, user_id, upload)
+        else:
+            _run_generation_job(app, job_id, user_id, text)
+    finally:
+        if upload_path:
+            os.remove(upload_path)
+
+def _run_generation_job(app, job_id, user_id, text):
+    with app.app_context():
+        job = db.session.get(GenerationJob, job_id)
+        if job is None:
+            return
+        
+        try:
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+            
+            for card_data in iter_flashcards_from_text(text):
+                bulk_insert_flashcards(user_id, [card_data], job_id=job_id)
+                job.card_count += 1
+                db.session.commit()
+            
+            job.status = 'done' if job.card_count else 'failed'
+            if not job.card_count:
+                job.error = 'Failed to generate flashcards. Please try again.'
+        except Exception as e:
+            db.session.rollback()
+            traceback.print_exc()
+            job = db.session.get(GenerationJob, job_id)
+            job.status = 'failed'
+            job.error = 'An error occurred while generating flashcards'
+        
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
@@ -0,0 +1,83 @@
+import heapq
+import math
+import re
+from collections import Counter
+from utils.ingest_utils import iter_sentences
+from utils.local_qa import STOPWORDS
+
+_TERM_RE = re.compile(r"[^\W\d_]{5,}")
+
+def iter_candidate_sentences(source):
+    """Sentences long enough to make a useful flashcard answer"""
+    for sentence in iter_sentences(source):
+        if len(sentence) > 20 and sentence.count(' ') >= 4:
+            yield sentence
+
+def sentence_terms(sentence):
+    """Lowercased content terms of a sentence, with their first surface form"""
+    terms = {}
+    for word in _TERM_RE.findall(sentence):
+        term = word.lower()
+        if term not in STOPWORDS and term not in terms:
+            terms[term] = word
+    return terms
+
+def extract_key_sentences(source, count):
+    """
+    Pick the `count` most informative sentences and the key term of each
+    
+    Sentences are treated as documents for TF-IDF. The first pass streams the
+    document to collect document frequencies; the second scores every
+    sentence and keeps the best `count` in a heap, so memory is bounded by
+    the vocabulary rather than the document. Returns (sentence, term) pairs
+    in document order.
+    """
+    document_frequency = Counter()
+    surface_forms = {}
+    sentence_count = 0
+    
+    for sentence in iter_candidate_sentences(source):
+        terms = sentence_terms(sentence)
+        document_frequency.update(terms.keys())
+        for term, word in terms.items():
+            surface_forms.setdefault(term, word)
+        sentence_count += 1
+    
+    if not sentence_count:
+        return []
+    
+    idf = {
+        term: math.log((1 + sentence_count) / (1 + frequency)) + 1.0
+        for term, frequency in document_frequency.items()
+    }
+    
+    best = []
+    for position, sentence in enumerate(iter_candidate_sentences(source)):
+        term_counts = Counter(word.lower() for word in _TERM_RE.findall(sentence))
+        weights = {term: tf * idf[term] for term, tf in term_counts.items() if term in idf}
+        if not weights:
+            continue
+        
+        # Length-normalized so long run-on sentences don't win by default
+        score = sum(weights.values()) / math.sqrt(sum(term_counts.values()))
+        key_terms = sorted(weights, key=lambda term: (weights[term], len(term)), reverse=True)[:3]
+        entry = (score, -position, sentence, key_terms)
+        
+        if len(best) < count * 2:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+    
+    # Keep one card per key term, then restore document order
+    picked = []
+    used_terms = set()
+    for score, negative_position, sentence, key_terms in sorted(best, reverse=True):
+        term = next((term for term in key_terms if term not in used_terms), None)
+        if term is None:
+            continue
+        used_terms.add(term)
+        picked.append((-negative_position, sentence, surface_forms[term]))
+        if len(picked) == count:
+            break
+    
+    return [(sentence, term) for _, sentence, term in sorted(picked)]
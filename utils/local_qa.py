@@ -0,0 +1,114 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r"[^\W\d_]+|\d+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+me more most my myself no nor not now of off on once only or other our ours ourselves out over own
+same she should so some such than that the their theirs them themselves then there these they this
+those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves
+""".split())
+
+# Words that carry no content in the generic question templates
+QUESTION_FILLER = frozenset("""
+main concept explained text key points mentioned here summarize information important detail
+passage described relationship being defined would
+""".split())
+
+# Cue words that mark a sentence as a good answer to a kind of question
+QUESTION_CUES = {
+    'defined': {'definition', 'define', 'defined', 'meaning', 'means', 'refers', 'called', 'known', 'is'},
+    'process': {'process', 'steps', 'step', 'procedure', 'first', 'then', 'next', 'finally', 'stage', 'stages', 'involves'},
+    'cause': {'cause', 'causes', 'caused', 'effect', 'effects', 'result', 'results', 'because', 'therefore', 'leads', 'due'},
+    'detail': {'must', 'only', 'always', 'never', 'percent', 'called', 'known'},
+}
+CUE_VOCABULARY = frozenset().union(*QUESTION_CUES.values())
+
+class LocalExtractiveQA:
+    """
+    Lightweight extractive question answering that runs on CPU with no network
+    
+    Each answer is the sentence of the context that best matches the question,
+    scored on keyword overlap, question-type cue words and how central the
+    sentence is to its chunk (with a small bonus for leading sentences). Contexts are analysed once and every question
+    for that context is scored in the same pass.
+    """
+    
+    def __init__(self, max_answer_length=300):
+        self.max_answer_length = max_answer_length
+        self._question_cache = {}
+    
+    def answer_batch(self, pairs):
+        """
+        Answer a batch of (question, context) pairs, returning answers in order
+        """
+        by_context = defaultdict(list)
+        for i, (question, context) in enumerate(pairs):
+            by_context[context].append((i, question))
+        
+        answers = [None] * len(pairs)
+        for context, questions in by_context.items():
+            sentences, sentence_terms, centrality = self._analyse_context(context)
+            if not sentences:
+                continue
+            
+            for i, question in questions:
+                keywords, cues = self._analyse_question(question)
+                best = max(
+                    range(len(sentences)),
+                    key=lambda s: self._score(sentence_terms[s], centrality[s], keywords, cues)
+                )
+                answers[i] = sentences[best][:self.max_answer_length]
+        
+        return answers
+    
+    def _analyse_context(self, context):
+        sentences = [s.strip() for s in _SENTENCE_END_RE.split(context) if len(s.strip()) > 10]
+        sentence_terms = [Counter(self._terms(sentence)) for sentence in sentences]
+        
+        # Centrality: overlap of a sentence's terms with the chunk's term distribution
+        chunk_terms = Counter()
+        for terms in sentence_terms:
+            chunk_terms.update(terms.keys())
+        
+        centrality = []
+        for position, terms in enumerate(sentence_terms):
+            if not terms:
+                centrality.append(0.0)
+                continue
+            shared = sum(chunk_terms[term] - 1 for term in terms)
+            # Topic sentences tend to come first in a paragraph
+            centrality.append(shared / math.sqrt(len(terms)) / max(len(sentences) - 1, 1) + 0.5 / (1 + position))
+        
+        return sentences, sentence_terms, centrality
+    
+    def _analyse_question(self, question):
+        analysis = self._question_cache.get(question)
+        if analysis is None:
+            words = set(_WORD_RE.findall(question.lower()))
+            keywords = {word for word in words if word not in STOPWORDS and word not in QUESTION_FILLER}
+            cues = set()
+            for kind, cue_words in QUESTION_CUES.items():
+                if kind in words:
+                    cues |= cue_words
+            analysis = (keywords, cues)
+            self._question_cache[question] = analysis
+        return analysis
+    
+    def _score(self, terms, centrality, keywords, cues):
+        overlap = sum(1 for keyword in keywords if keyword in terms)
+        cue_hits = sum(1 for cue in cues if cue in terms)
+        return 2.0 * overlap + 1.0 * cue_hits + centrality
+    
+    @staticmethod
+    def _terms(sentence):
+        return [
+            word for word in _WORD_RE.findall(sentence.lower())
+            if word not in STOPWORDS or word in CUE_VOCABULARY
+        ]
@@ -0,0 +1,327 @@
+import json
+import threading
+import time
+import uuid
+import click
+from datetime import datetime, timedelta
+from flask.cli import with_appcontext
+from config import Config
+from models import db, EmailOutbox, Suggestion, User
+from utils.bulk_utils import insert_ignore
+from utils.email_utils import deliver_emails
+
+_worker_thread = None
+_worker_lock = threading.Lock()
+
+def enqueue_emails(messages, requeue_failed=False):
+    """
+    Add emails to the outbox, skipping any whose idempotency key is already queued
+    
+    `messages` are dicts with kind, key (the idempotency key), email and a
+    template context. With `requeue_failed`, rows with the same key that
+    gave up after OUTBOX_MAX_ATTEMPTS go back to pending with a fresh set of
+    attempts. Commits and returns the number of rows queued.
+    """
+    now = datetime.utcnow()
+    rows = [{
+        'idempotency_key': message['key'],
+        'kind': message['kind'],
+        'recipient': message['email'],
+        'payload': json.dumps(message.get('context') or {}),
+        'status': 'pending',
+        'attempts': 0,
+        'available_at': now,
+        'created_at': now
+    } for message in messages]
+    
+    try:
+        inserted = insert_ignore(EmailOutbox, rows)
+        if requeue_failed and rows:
+            inserted += EmailOutbox.query.filter(
+                EmailOutbox.idempotency_key.in_([row['idempotency_key'] for row in rows]),
+                EmailOutbox.status == 'failed'
+            ).update({
+                'status': 'pending',
+                'attempts': 0,
+                'available_at': now,
+                'claimed_by': None,
+                'last_error': None
+            }, synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return inserted
+
+def pending_confirmations_query(high, after, batch_size):
+    """Users after `after` with unsent suggestions up to id `high`, with their newest such id"""
+    return db.session.query(
+        User.id, User.email, User.username, db.func.max(Suggestion.id)
+    ).join(Suggestion).filter(
+        Suggestion.email_sent == False,
+        Suggestion.id <= high,
+        Suggestion.user_id > after
+    ).group_by(User.id, User.email, User.username).order_by(User.id).limit(batch_size)
+
+def enqueue_suggestion_confirmations(batch_size=None):
+    """
+    Queue one confirmation per user with unsent suggestions, a batch of users at a time
+    
+    The pending range is snapshotted first: only suggestions up to the newest
+    id at the start are covered, so ones submitted while this runs wait for
+    the next send. Users are walked in user_id order with a keyset (user_id >
+    last seen) and each batch is enqueued and committed before the next one is
+    read, so memory stays bounded by the batch size however many users are
+    pending. Each message records the newest suggestion id it covers; the
+    outbox flags exactly those suggestions once the email is delivered.
+    Confirmations that failed for good earlier are queued again. Returns
+    (users, queued); users whose confirmation is already waiting in the
+    outbox are counted but not queued.
+    """
+    batch_size = batch_size or Config.SUGGESTION_CONFIRMATION_BATCH_SIZE
+    high = db.session.query(db.func.max(Suggestion.id)).filter(Suggestion.email_sent == False).scalar()
+    if high is None:
+        return 0, 0
+    
+    users = queued = 0
+    after = 0
+    while True:
+        batch = pending_confirmations_query(high, after, batch_size).all()
+        if not batch:
+            break
+        
+        # The key stops repeat sends from double-queueing the same suggestions
+        queued += enqueue_emails([{
+            'kind': 'suggestion_confirmation',
+            'key': f'suggestion_confirmation:{user_id}:{last_suggestion_id}',
+            'email': email,
+            'context': {'user_id': user_id, 'username': username, 'last_suggestion_id': last_suggestion_id}
+        } for user_id, email, username, last_suggestion_id in batch], requeue_failed=True)
+        users += len(batch)
+        after = batch[-1][0]
+    
+    return users, queued
+
+def _claimable(now):
+    """Rows that are due, or stuck in 'sending' past their lease"""
+    lease_expired = now - timedelta(seconds=Config.OUTBOX_LEASE_SECONDS)
+    return db.or_(
+        db.and_(EmailOutbox.status == 'pending', EmailOutbox.available_at <= now),
+        db.and_(EmailOutbox.status == 'sending', EmailOutbox.claimed_at < lease_expired)
+    )
+
+def claimable_query(now, batch_size):
+    """Ids of the next claimable rows, locked with FOR UPDATE SKIP LOCKED"""
+    return db.session.query(EmailOutbox.id).filter(_claimable(now)).order_by(
+        EmailOutbox.id
+    ).limit(batch_size).with_for_update(skip_locked=True)
+
+def claim_batch(worker_id, batch_size=None):
+    """
+    Claim a batch of due outbox rows for this worker
+    
+    Candidates are locked with SELECT ... FOR UPDATE SKIP LOCKED so parallel
+    workers pick disjoint rows without waiting on each other. The claim itself
+    is a conditional UPDATE, which keeps it safe on databases without SKIP
+    LOCKED too. Rows stuck in 'sending' past OUTBOX_LEASE_SECONDS (a worker
+    died mid-batch) are claimed again.
+    """
+    batch_size = batch_size or Config.OUTBOX_BATCH_SIZE
+    now = datetime.utcnow()
+    claimable = _claimable(now)
+    
+    try:
+        ids = [row[0] for row in claimable_query(now, batch_size)]
+        if not ids:
+            db.session.rollback()
+            return []
+        
+        EmailOutbox.query.filter(EmailOutbox.id.in_(ids), claimable).update({
+            'status': 'sending',
+            'claimed_by': worker_id,
+            'claimed_at': now,
+            'attempts': EmailOutbox.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return EmailOutbox.query.filter(
+        EmailOutbox.id.in_(ids),
+        EmailOutbox.claimed_by == worker_id,
+        EmailOutbox.status == 'sending'
+    ).order_by(EmailOutbox.id).all()
+
+def record_result(result):
+    """
+    Mark one outbox row sent or schedule its retry, committing right away
+    
+    Only rows this worker still holds are updated: if its lease expired and
+    another worker reclaimed the row, the late result is dropped rather than
+    overwriting the new claim. A delivered suggestion confirmation flags the
+    suggestions it covers in the same transaction.
+    """
+    recipient = result['recipient']
+    now = datetime.utcnow()
+    claimed = EmailOutbox.query.filter(
+        EmailOutbox.id == recipient['outbox_id'],
+        EmailOutbox.claimed_by == recipient['claimed_by'],
+        EmailOutbox.status == 'sending'
+    )
+    
+    try:
+        if result['status'] == 'sent':
+            updated = claimed.update(
+                {'status': 'sent', 'sent_at': now, 'last_error': None}, synchronize_session=False
+            )
+            if updated and recipient['kind'] == 'suggestion_confirmation':
+                Suggestion.query.filter(
+                    Suggestion.user_id == recipient['user_id'],
+                    Suggestion.id <= recipient['last_suggestion_id'],
+                    Suggestion.email_sent == False
+                ).update({'email_sent': True}, synchronize_session=False)
+        else:
+            attempts = recipient['attempts']
+            retry_in = Config.OUTBOX_RETRY_BACKOFF * (2 ** (attempts - 1))
+            updated = claimed.update({
+                'status': 'failed' if attempts >= Config.OUTBOX_MAX_ATTEMPTS else 'pending',
+                'available_at': now + timedelta(seconds=retry_in),
+                'last_error': (result['error'] or '')[:255]
+            }, synchronize_session=False)
+        if not updated:
+            print(f"Outbox row {recipient['outbox_id']} was reclaimed by another worker; dropping this result")
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Failed to record outbox result for {recipient['email']}: {e}")
+
+def drain_outbox(app, worker_id=None, batch_size=None, max_batches=None):
+    """
+    Send claimed batches until the outbox has nothing due, returning (sent, failed)
+    """
+    worker_id = worker_id or uuid.uuid4().hex
+    sent = failed = batches = 0
+    
+    while max_batches is None or batches < max_batches:
+        rows = claim_batch(worker_id, batch_size)
+        if not rows:
+            break
+        batches += 1
+        
+        recipients = []
+        for row in rows:
+            recipient = json.loads(row.payload)
+            recipient.update(outbox_id=row.id, kind=row.kind, email=row.recipient, attempts=row.attempts, claimed_by=worker_id)
+            recipients.append(recipient)
+        db.session.commit()
+        
+        start = time.perf_counter()
+        results = deliver_emails(app, recipients, on_result=record_result)
+        elapsed = time.perf_counter() - start
+        
+        batch_sent = sum(1 for result in results if result['status'] == 'sent')
+        sent += batch_sent
+        failed += len(results) - batch_sent
+        print(f"Outbox batch: {batch_sent} sent, {len(results) - batch_sent} failed "
+              f"in {elapsed:.2f}s ({len(results) / elapsed if elapsed else 0:.1f} msg/s)")
+    
+    return sent, failed
+
+def get_outbox_stats():
+    """Queue depth by status, the age of the oldest due message and recent throughput"""
+    now = datetime.utcnow()
+    counts = dict(db.session.query(EmailOutbox.status, db.func.count(EmailOutbox.id))
+                  .group_by(EmailOutbox.status).all())
+    
+    oldest = db.session.query(db.func.min(EmailOutbox.available_at)).filter(
+        EmailOutbox.status == 'pending',
+        EmailOutbox.available_at <= now
+    ).scalar()
+    
+    def sent_since(seconds):
+        return db.session.query(db.func.count(EmailOutbox.id)).filter(
+            EmailOutbox.sent_at >= now - timedelta(seconds=seconds)
+        ).scalar()
+    
+    sent_last_minute = sent_since(60)
+    sent_last_hour = sent_since(3600)
+    
+    return {
+        'pending': counts.get('pending', 0),
+        'sending': counts.get('sending', 0),
+        'sent': counts.get('sent', 0),
+        'failed': counts.get('failed', 0),
+        'oldest_pending_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+        'sent_last_minute': sent_last_minute,
+        'sent_last_hour': sent_last_hour,
+        'per_second_last_minute': round(sent_last_minute / 60, 2),
+        'per_second_last_hour': round(sent_last_hour / 3600, 2)
+    }
+
+def run_worker(app, poll_interval=None, stop_event=None):
+    """Drain the outbox forever, sleeping poll_interval seconds whenever it is empty"""
+    poll_interval = poll_interval or Config.OUTBOX_POLL_INTERVAL
+    worker_id = uuid.uuid4().hex
+    
+    while stop_event is None or not stop_event.is_set():
+        with app.app_context():
+            try:
+                drain_outbox(app, worker_id=worker_id)
+            except Exception as e:
+                print(f"Outbox worker error: {e}")
+            finally:
+                db.session.remove()
+        time.sleep(poll_interval)
+
+def start_outbox_worker(app):
+    """Drain the outbox from a daemon thread, unless OUTBOX_INPROCESS_WORKER is off"""
+    global _worker_thread
+    
+    if not app.config.get('OUTBOX_INPROCESS_WORKER'):
+        return None
+    
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=run_worker, args=(app,), name='email-outbox', daemon=True)
+            _worker_thread.start()
+        return _worker_thread
+
+@click.group('outbox')
+def outbox_cli():
+    """Outbound email queue."""
+
+@outbox_cli.command('worker')
+@click.option('--poll-interval', type=float, default=None, help='Seconds to wait when the outbox is empty.')
+@with_appcontext
+def worker_command(poll_interval):
+    """Run a worker that keeps draining the outbox."""
+    from flask import current_app
+    
+    click.echo('Outbox worker started')
+    run_worker(current_app._get_current_object(), poll_interval=poll_interval)
+
+@outbox_cli.command('drain')
+@click.option('--batch-size', type=int, default=None, help='Messages claimed per batch (defaults to OUTBOX_BATCH_SIZE).')
+@with_appcontext
+def drain_command(batch_size):
+    """Send everything currently due, then exit."""
+    from flask import current_app
+    
+    sent, failed = drain_outbox(current_app._get_current_object(), batch_size=batch_size)
+    click.echo(f"Sent {sent}, failed {failed}")
+
+@outbox_cli.command('confirmations')
+@click.option('--batch-size', type=int, default=None, help='Users per batch (defaults to SUGGESTION_CONFIRMATION_BATCH_SIZE).')
+@with_appcontext
+def confirmations_command(batch_size):
+    """Queue confirmation emails for all unsent suggestions."""
+    users, queued = enqueue_suggestion_confirmations(batch_size=batch_size)
+    click.echo(f"Queued {queued} confirmations ({users} users pending)")
+
+@outbox_cli.command('stats')
+@with_appcontext
+def stats_command():
+    """Show queue depth and throughput."""
+    for name, value in get_outbox_stats().items():
+        click.echo(f"{name}: {value}")
@@ -0,0 +1,145 @@
+import hashlib
+import click
+from datetime import datetime
+from flask import has_app_context
+from flask.cli import with_appcontext
+from config import Config
+from models import db, QAAnswer
+from utils.cache_utils import normalize_text
+
+def make_memo_key(question, chunk, model):
+    """
+    Key for a single QA answer: the question, a hash of the chunk and the model
+    """
+    chunk_hash = hashlib.sha256(normalize_text(chunk).encode('utf-8')).hexdigest()
+    digest = hashlib.sha256()
+    for part in (model, question, chunk_hash):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def get_memoized_answers(keys):
+    """
+    Look up memoized answers for many keys in one query, returning {key: answer}
+    """
+    if not Config.QA_MEMO_ENABLED or not keys or not has_app_context():
+        return {}
+    
+    try:
+        rows = db.session.query(QAAnswer.memo_key, QAAnswer.answer).filter(
+            QAAnswer.memo_key.in_(set(keys))
+        ).all()
+        
+        answers = dict(rows)
+        if answers:
+            QAAnswer.query.filter(QAAnswer.memo_key.in_(list(answers))).update(
+                {'last_used_at': datetime.utcnow(), 'hits': QAAnswer.hits + 1},
+                synchronize_session=False
+            )
+            db.session.commit()
+        return answers
+    except Exception as e:
+        db.session.rollback()
+        print(f"QA memo lookup failed: {e}")
+        return {}
+
+def memoize_answers(entries):
+    """
+    Store (key, question, model, answer) tuples and trim the memo to its byte budget
+    """
+    if not Config.QA_MEMO_ENABLED or not entries or not has_app_context():
+        return
+    
+    now = datetime.utcnow()
+    try:
+        for key, question, model, answer in entries:
+            db.session.merge(QAAnswer(
+                memo_key=key,
+                question=question,
+                model=model,
+                answer=answer,
+                size_bytes=len(answer.encode('utf-8')) + len(question.encode('utf-8')),
+                created_at=now,
+                last_used_at=now
+            ))
+        db.session.commit()
+        evict_answers(Config.QA_MEMO_MAX_BYTES)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Failed to store QA answers: {e}")
+
+def evict_answers(max_bytes):
+    """
+    Drop least recently used answers until the memo fits in max_bytes
+    """
+    total = db.session.query(db.func.coalesce(db.func.sum(QAAnswer.size_bytes), 0)).scalar()
+    if total <= max_bytes:
+        return 0
+    
+    stale_keys = []
+    oldest = db.session.query(QAAnswer.memo_key, QAAnswer.size_bytes).order_by(QAAnswer.last_used_at.asc())
+    for memo_key, size_bytes in oldest.yield_per(500):
+        if total <= max_bytes:
+            break
+        stale_keys.append(memo_key)
+        total -= size_bytes
+    
+    evicted = 0
+    for start in range(0, len(stale_keys), 500):
+        evicted += QAAnswer.query.filter(
+            QAAnswer.memo_key.in_(stale_keys[start:start + 500])
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return evicted
+
+def get_memo_stats():
+    """Summary of the memo size and usage"""
+    entries, size, hits = db.session.query(
+        db.func.count(QAAnswer.memo_key),
+        db.func.coalesce(db.func.sum(QAAnswer.size_bytes), 0),
+        db.func.coalesce(db.func.sum(QAAnswer.hits), 0)
+    ).one()
+    
+    return {
+        'entries': entries,
+        'size_bytes': int(size),
+        'max_bytes': Config.QA_MEMO_MAX_BYTES,
+        'hits': int(hits)
+    }
+
+@click.group('qa-memo')
+def qa_memo_cli():
+    """Inspect and manage the QA answer memo."""
+
+@qa_memo_cli.command('stats')
+@with_appcontext
+def stats_command():
+    """Show memo size and hit counts."""
+    for name, value in get_memo_stats().items():
+        click.echo(f"{name}: {value}")
+
+@qa_memo_cli.command('warm')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def warm_command(paths):
+    """Generate flashcards for study text files to pre-fill the memo."""
+    from utils.ai_utils import generate_with_huggingface_api
+    
+    if not Config.HUGGINGFACE_API_KEY:
+        raise click.ClickException('HUGGINGFACE_API_KEY is not set')
+    
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            cards = generate_with_huggingface_api(f.read())
+        click.echo(f"{path}: {len(cards)} flashcards")
+    
+    for name, value in get_memo_stats().items():
+        click.echo(f"{name}: {value}")
+
+@qa_memo_cli.command('evict')
+@click.option('--max-bytes', type=int, default=None, help='Byte budget to trim to (defaults to QA_MEMO_MAX_BYTES).')
+@with_appcontext
+def evict_command(max_bytes):
+    """Trim the memo to its byte budget, least recently used first."""
+    evicted = evict_answers(Config.QA_MEMO_MAX_BYTES if max_bytes is None else max_bytes)
+    click.echo(f"Evicted {evicted} answers")
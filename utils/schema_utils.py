@@ -0,0 +1,230 @@
+import os
+import re
+import click
+from datetime import datetime
+from functools import lru_cache
+from alembic.script import ScriptDirectory
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import UniqueConstraint
+from config import Config
+from models import db, User, Flashcard
+from utils.outbox_utils import claimable_query, pending_confirmations_query
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# GET routes on the hot path; every SELECT they issue must use an index
+HOT_ROUTES = (
+    '/flashcards/library',
+    '/flashcards/api/cards',
+    '/flashcards/api/due',
+    '/flashcards/api/due?ahead=1',
+    '/flashcards/api/search?q=the',
+    '/flashcards/api/stats',
+    '/suggestions/'
+)
+
+# Hot queries behind write endpoints and workers, run here without their writes
+HOT_QUERIES = {
+    'suggestion confirmation batch': lambda: pending_confirmations_query(2 ** 31 - 1, 0, Config.SUGGESTION_CONFIRMATION_BATCH_SIZE).all(),
+    'outbox claim': lambda: claimable_query(datetime.utcnow(), Config.OUTBOX_BATCH_SIZE).all()
+}
+
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+@lru_cache(maxsize=None)
+def migration_heads():
+    """Newest revision(s) in migrations/, read from the revision files without a database"""
+    return tuple(sorted(ScriptDirectory(MIGRATIONS_DIR).get_heads()))
+
+def database_revisions(engine=None):
+    """
+    Revision(s) recorded in the database's alembic_version table
+    
+    A single SELECT, so it is cheap enough to run on every boot. Returns an
+    empty tuple when the table does not exist yet.
+    """
+    try:
+        with (engine or db.engine).connect() as connection:
+            return tuple(sorted(row[0] for row in connection.execute(text('SELECT version_num FROM alembic_version'))))
+    except (OperationalError, ProgrammingError) as e:
+        if 'alembic_version' in str(e):
+            return ()
+        raise
+
+def check_schema_version(app):
+    """
+    Compare the database revision with the migrations shipped with the code
+    
+    Replaces running db.create_all() on every boot. With SCHEMA_VERSION_CHECK
+    set to 'fail' a mismatch stops the worker from starting, with 'warn' it
+    is only reported, and 'off' skips the check. Returns True if the schema
+    is current.
+    """
+    mode = app.config.get('SCHEMA_VERSION_CHECK', 'warn')
+    if mode == 'off':
+        return True
+    
+    with app.app_context():
+        try:
+            current = database_revisions()
+        except Exception as e:
+            print(f"⚠️ Could not read the schema version: {e}")
+            return False
+    
+    expected = migration_heads()
+    if current == expected:
+        return True
+    
+    message = (f"Database schema is at {', '.join(current) or 'no revision'} but the code expects "
+               f"{', '.join(expected)}; run `python migrate_db.py` or `flask db upgrade`")
+    if mode == 'fail':
+        raise RuntimeError(message)
+    print(f"⚠️ {message}")
+    return False
+
+def upgrade_schema(revision='head'):
+    """Apply pending migrations to the app's database (needs an app context)"""
+    from flask_migrate import upgrade
+    
+    upgrade(directory=MIGRATIONS_DIR, revision=revision)
+
+def missing_indexes(engine=None):
+    """
+    Model-declared indexes and unique constraints the live database lacks
+    
+    Indexes are matched on their leading columns rather than by name, so a
+    database built by migrate_db.py with its own index names still passes.
+    Returns (table, index name, columns) tuples; a missing table has no columns.
+    """
+    inspector = inspect(engine or db.engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            missing.append((table.name, None, ()))
+            continue
+        
+        live = [tuple(index['column_names']) for index in inspector.get_indexes(table.name)]
+        live += [tuple(constraint['column_names']) for constraint in inspector.get_unique_constraints(table.name)]
+        live.append(tuple(inspector.get_pk_constraint(table.name)['constrained_columns']))
+        
+        declared = [(index.name, tuple(column.name for column in index.columns)) for index in table.indexes]
+        declared += [
+            (constraint.name, tuple(column.name for column in constraint.columns))
+            for constraint in table.constraints if isinstance(constraint, UniqueConstraint)
+        ]
+        for name, columns in declared:
+            if not any(existing[:len(columns)] == columns for existing in live):
+                missing.append((table.name, name, columns))
+    
+    return missing
+
+def full_scans(connection, statement, parameters, min_rows=0):
+    """
+    Tables a SELECT reads with a full table scan, according to EXPLAIN
+    
+    On MySQL every type ALL access counts, including ones where the optimizer
+    rejected a usable index; pass `min_rows` to ignore scans whose row
+    estimate is below it (small tables are scanned on purpose). Derived
+    tables and other dialects are ignored.
+    """
+    tables = set(db.metadata.tables)
+    dialect = connection.dialect.name
+    
+    if dialect == 'mysql':
+        rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings()
+        return [
+            row['table'] for row in rows
+            if row['type'] == 'ALL' and row['table'] in tables and (row['rows'] or 0) >= min_rows
+        ]
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+        scans = (_SQLITE_SCAN_RE.match(row[3]) for row in rows)
+        return [match.group(1) for match in scans if match and match.group(1) in tables]
+    return []
+
+def capture_hot_selects(app, user_id):
+    """Run the hot routes and queries for a user, returning (source, statement, parameters) for each SELECT"""
+    captured = []
+    source = [None]
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            captured.append((source[0], statement, parameters))
+    
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        for path in HOT_ROUTES:
+            source[0] = path
+            response = client.get(path)
+            if response.status_code >= 400:
+                print(f"⚠️ {path} returned {response.status_code}")
+        
+        for name, run in HOT_QUERIES.items():
+            source[0] = name
+            run()
+            db.session.rollback()
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+    
+    return captured
+
+@click.group('schema')
+def schema_cli():
+    """Schema and query plan checks."""
+
+@schema_cli.command('check-indexes')
+@with_appcontext
+def check_indexes_command():
+    """Fail if the database lacks an index declared on the models."""
+    missing = missing_indexes()
+    for table, name, columns in missing:
+        if columns:
+            click.echo(f"❌ {table}: missing {name} ({', '.join(columns)})")
+        else:
+            click.echo(f"❌ {table}: table missing")
+    if missing:
+        raise click.ClickException(f"{len(missing)} schema objects missing; run `flask db upgrade` or migrate_db.py")
+    click.echo("✅ All model indexes present")
+
+@schema_cli.command('check-plans')
+@click.option('--user-id', type=int, default=None, help='User to run the routes as (defaults to the one with the most cards).')
+@click.option('--min-rows', type=int, default=0, help='Ignore MySQL full scans estimated to read fewer rows than this.')
+@with_appcontext
+def check_plans_command(user_id, min_rows):
+    """Fail if a hot-path query does a full table scan.
+    
+    Run it against a database with realistic data so the plans match production.
+    """
+    if user_id is None:
+        user_id = db.session.query(Flashcard.user_id).group_by(Flashcard.user_id).order_by(
+            db.func.count(Flashcard.id).desc()
+        ).limit(1).scalar() or db.session.query(db.func.min(User.id)).scalar()
+    if user_id is None:
+        raise click.ClickException("Need at least one user to run the hot routes as")
+    
+    captured = capture_hot_selects(current_app._get_current_object(), user_id)
+    failures = 0
+    with db.engine.connect() as connection:
+        for source, statement, parameters in captured:
+            scanned = full_scans(connection, statement, parameters, min_rows=min_rows)
+            if scanned:
+                failures += 1
+                click.echo(f"❌ {source}: full scan of {', '.join(scanned)}")
+                click.echo(f"    {' '.join(statement.split())[:300]}")
+    
+    click.echo(f"Checked {len(captured)} queries from {len(HOT_ROUTES)} routes and {len(HOT_QUERIES)} jobs")
+    if failures:
+        raise click.ClickException(f"{failures} hot-path queries do a full table scan")
+    click.echo("✅ No full table scans")
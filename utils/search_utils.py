@@ -0,0 +1,68 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.dialects.mysql import match
+from config import Config
+from models import db, Flashcard
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+def search_tokens(query):
+    """Lowercased search terms, stripped of full-text operator characters"""
+    return _TOKEN_RE.findall(query.lower())[:10]
+
+def search_flashcards(user_id, query, page=1, difficulty=None, per_page=None):
+    """
+    Ranked, paginated search over a user's flashcards
+    
+    Every term must match, as a prefix, in the title, question or answer.
+    Returns (flashcards, has_more). With no search terms the difficulty
+    filter alone is applied and cards come back newest first.
+    """
+    per_page = min(per_page or Config.LIBRARY_PAGE_SIZE, Config.LIBRARY_MAX_PAGE_SIZE)
+    page = max(page, 1)
+    tokens = search_tokens(query or '')
+    
+    base = Flashcard.query.filter(Flashcard.user_id == user_id)
+    if difficulty:
+        base = base.filter(Flashcard.difficulty == difficulty)
+    
+    dialect = db.engine.dialect.name
+    if not tokens:
+        ranked = base.order_by(Flashcard.created_at.desc(), Flashcard.id.desc())
+    elif dialect == 'mysql':
+        ranked = _mysql_fulltext(base, tokens)
+    elif dialect == 'sqlite':
+        ranked = _sqlite_fts(base, tokens)
+    else:
+        ranked = _like_search(base, tokens)
+    
+    flashcards = ranked.offset((page - 1) * per_page).limit(per_page + 1).all()
+    return flashcards[:per_page], len(flashcards) > per_page
+
+def _mysql_fulltext(base, tokens):
+    relevance = match(
+        Flashcard.title, Flashcard.question, Flashcard.answer,
+        against=' '.join(f'+{token}*' for token in tokens)
+    ).in_boolean_mode()
+    
+    return base.filter(relevance > 0).order_by(relevance.desc(), Flashcard.id.desc())
+
+def _sqlite_fts(base, tokens):
+    fts_query = ' '.join(f'"{token}"*' for token in tokens)
+    # bm25 is lower-is-better; title matches weigh most, then questions
+    ranked = text(
+        "SELECT rowid AS id, bm25(flashcards_fts, 10.0, 5.0, 1.0) AS rank "
+        "FROM flashcards_fts WHERE flashcards_fts MATCH :query"
+    ).bindparams(query=fts_query).columns(id=db.Integer, rank=db.Float).subquery()
+    
+    return base.join(ranked, ranked.c.id == Flashcard.id).order_by(ranked.c.rank.asc(), Flashcard.id.desc())
+
+def _like_search(base, tokens):
+    for token in tokens:
+        pattern = f'%{token}%'
+        base = base.filter(db.or_(
+            Flashcard.title.ilike(pattern),
+            Flashcard.question.ilike(pattern),
+            Flashcard.answer.ilike(pattern)
+        ))
+    return base.order_by(Flashcard.created_at.desc(), Flashcard.id.desc())
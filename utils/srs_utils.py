@@ -0,0 +1,88 @@
+import base64
+from datetime import datetime, timedelta
+from config import Config
+from models import db, Flashcard
+
+# SM-2 grades used for the two study buttons
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+MIN_EASE = 1.3
+
+def schedule_review(ease_factor, interval_days, repetitions, quality, now=None):
+    """
+    Next SM-2 state for a card after one review graded 0-5
+    
+    Returns (ease_factor, interval_days, repetitions, due_at). Failed cards
+    restart their repetitions and come back after STUDY_RELEARN_MINUTES.
+    """
+    now = now or datetime.utcnow()
+    ease_factor = ease_factor or Config.SRS_INITIAL_EASE
+    interval_days = interval_days or 0
+    repetitions = repetitions or 0
+    
+    ease_factor = max(MIN_EASE, ease_factor + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    
+    if quality < 3:
+        return ease_factor, 0, 0, now + timedelta(minutes=Config.STUDY_RELEARN_MINUTES)
+    
+    if repetitions == 0:
+        interval_days = 1
+    elif repetitions == 1:
+        interval_days = 6
+    else:
+        interval_days = max(1, round(interval_days * ease_factor))
+    interval_days = min(interval_days, Config.SRS_MAX_INTERVAL_DAYS)
+    
+    return ease_factor, interval_days, repetitions + 1, now + timedelta(days=interval_days)
+
+def encode_due_cursor(flashcard, started):
+    """Opaque keyset cursor pointing just past the given card in the due queue"""
+    raw = f"{flashcard.due_at.isoformat()}|{flashcard.id}|{started.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_due_cursor(cursor):
+    """Return (due_at, id, session start) from a due-queue cursor, or raise ValueError"""
+    due_at, flashcard_id, started = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+    return datetime.fromisoformat(due_at), int(flashcard_id), datetime.fromisoformat(started)
+
+def get_due_cards(user_id, limit=None, cursor=None, ahead=False):
+    """
+    The next cards a user should review, soonest due first, and the next cursor
+    
+    Walks the (user_id, due_at, id) index, so fetching the next N cards costs
+    the same with a hundred cards as with a million. Only cards that are due
+    now are returned unless `ahead` is set.
+    
+    The cursor also carries when the study session started. Reviewing a card
+    pushes its due_at past the cursor, so later pages skip cards reviewed
+    since then instead of serving them again in the same session.
+    """
+    limit = min(limit or Config.LIBRARY_PAGE_SIZE, Config.LIBRARY_MAX_PAGE_SIZE)
+    query = Flashcard.query.filter(Flashcard.user_id == user_id)
+    started = datetime.utcnow()
+    
+    if not ahead:
+        query = query.filter(Flashcard.due_at <= started)
+    if cursor:
+        due_at, flashcard_id, started = decode_due_cursor(cursor)
+        query = query.filter(
+            db.tuple_(Flashcard.due_at, Flashcard.id) > (due_at, flashcard_id),
+            db.or_(Flashcard.last_reviewed_at.is_(None), Flashcard.last_reviewed_at < started)
+        )
+    
+    flashcards = query.order_by(Flashcard.due_at.asc(), Flashcard.id.asc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(flashcards) > limit:
+        flashcards = flashcards[:limit]
+        next_cursor = encode_due_cursor(flashcards[-1], started)
+    
+    return flashcards, next_cursor
+
+def count_due_cards(user_id):
+    """Number of cards due now, counted from the due index"""
+    return db.session.query(db.func.count(Flashcard.id)).filter(
+        Flashcard.user_id == user_id,
+        Flashcard.due_at <= datetime.utcnow()
+    ).scalar()
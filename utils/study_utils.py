@@ -0,0 +1,379 @@
+import threading
+import time
+import click
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, insert
+from config import Config
+from models import db, Flashcard, StudySession, CardDailyStat, UserDailyStat, RollupState
+from utils.srs_utils import schedule_review, QUALITY_CORRECT, QUALITY_INCORRECT
+
+ROLLUP_NAME = 'study_daily'
+
+_rollup_thread = None
+_rollup_lock = threading.Lock()
+
+def parse_study_events(raw_events):
+    """
+    Validate study events from the client, dropping malformed entries
+    
+    Returns a list of (flashcard_id, is_correct, time_spent_ms) tuples.
+    """
+    events = []
+    for raw in raw_events[:Config.STUDY_EVENTS_MAX_BATCH]:
+        if not isinstance(raw, dict):
+            continue
+        try:
+            flashcard_id = int(raw.get('flashcard_id'))
+            time_spent = max(0, min(int(raw.get('time_spent_ms') or 0), 3600 * 1000))
+        except (TypeError, ValueError):
+            continue
+        events.append((flashcard_id, bool(raw.get('is_correct', False)), time_spent))
+    return events
+
+def apply_study_events(user_id, events):
+    """
+    Log a batch of study events and update the cards in one transaction
+    
+    Events for cards the user doesn't own are dropped. The rest are appended
+    to the study log with a single bulk insert, then grouped per card: the
+    counters are applied as atomic `SET times_studied = times_studied + n`
+    updates, and each card's SM-2 schedule is advanced through its events in
+    order. The schedule is computed in Python from the values read, so the
+    card rows are locked (in id order, to avoid deadlocks) until the commit;
+    a concurrent batch for the same cards waits and then builds on this
+    one's schedule. All card updates go out as one executemany. Returns the
+    number of cards updated.
+    """
+    card_ids = {flashcard_id for flashcard_id, _, _ in events}
+    if not card_ids:
+        return 0
+    
+    schedules = {
+        row.id: [row.ease_factor, row.interval_days, row.repetitions, row.due_at]
+        for row in db.session.query(
+            Flashcard.id, Flashcard.ease_factor, Flashcard.interval_days,
+            Flashcard.repetitions, Flashcard.due_at
+        ).filter(
+            Flashcard.user_id == user_id,
+            Flashcard.id.in_(card_ids)
+        ).order_by(Flashcard.id).with_for_update()
+    }
+    events = [event for event in events if event[0] in schedules]
+    if not events:
+        db.session.rollback()
+        return 0
+    
+    now = datetime.utcnow()
+    log_rows = []
+    totals = defaultdict(lambda: [0, 0])
+    for flashcard_id, is_correct, time_spent in events:
+        log_rows.append({
+            'user_id': user_id,
+            'flashcard_id': flashcard_id,
+            'is_correct': is_correct,
+            'time_spent': time_spent,
+            'created_at': now
+        })
+        totals[flashcard_id][0] += 1
+        if is_correct:
+            totals[flashcard_id][1] += 1
+        
+        state = schedules[flashcard_id]
+        quality = QUALITY_CORRECT if is_correct else QUALITY_INCORRECT
+        schedules[flashcard_id] = list(schedule_review(*state[:3], quality, now=now))
+    
+    flashcards = Flashcard.__table__
+    statement = flashcards.update().where(
+        flashcards.c.id == bindparam('card_id'),
+        flashcards.c.user_id == bindparam('owner_id')
+    ).values(
+        times_studied=flashcards.c.times_studied + bindparam('studied'),
+        correct_answers=flashcards.c.correct_answers + bindparam('correct'),
+        ease_factor=bindparam('ease'),
+        interval_days=bindparam('interval'),
+        repetitions=bindparam('reps'),
+        due_at=bindparam('due'),
+        last_reviewed_at=bindparam('reviewed')
+    )
+    
+    params = []
+    for flashcard_id, (studied, correct) in sorted(totals.items()):
+        ease_factor, interval_days, repetitions, due_at = schedules[flashcard_id]
+        params.append({
+            'card_id': flashcard_id,
+            'owner_id': user_id,
+            'studied': studied,
+            'correct': correct,
+            'ease': ease_factor,
+            'interval': interval_days,
+            'reps': repetitions,
+            'due': due_at,
+            'reviewed': now
+        })
+    
+    try:
+        db.session.execute(insert(StudySession.__table__), log_rows)
+        db.session.execute(statement, params)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return len(params)
+
+def _as_date(value):
+    """func.date() comes back as a string on SQLite and a date on MySQL"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def upsert_increment(model, rows, keys, counters):
+    """
+    Insert rollup rows, adding the counters onto any row that already exists
+    
+    Uses the dialect's native upsert so each batch is one executemany.
+    """
+    if not rows:
+        return
+    
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(table)
+        statement = statement.on_duplicate_key_update(
+            {name: table.c[name] + statement.inserted[name] for name in counters}
+        )
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: table.c[name] + statement.excluded[name] for name in counters}
+        )
+    else:
+        for row in rows:
+            key_filter = [table.c[name] == row[name] for name in keys]
+            updated = db.session.execute(
+                table.update().where(*key_filter).values(
+                    {name: table.c[name] + row[name] for name in counters}
+                )
+            ).rowcount
+            if not updated:
+                db.session.execute(table.insert().values(row))
+        return
+    
+    db.session.execute(statement, rows)
+
+def ensure_rollup_state():
+    """
+    Create the rollup watermark row if it doesn't exist yet
+    
+    A concurrent run may insert it first, so a failed insert is fine as long
+    as the row is there afterwards; otherwise the error is raised.
+    """
+    if db.session.get(RollupState, ROLLUP_NAME) is not None:
+        return
+    
+    db.session.add(RollupState(name=ROLLUP_NAME, last_event_id=0))
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if db.session.get(RollupState, ROLLUP_NAME) is None:
+            raise
+
+def rollup_study_events(batch_size=None, lag=None):
+    """
+    Fold new study events into the daily per-card and per-user stats
+    
+    Works through the log in id order from the stored watermark. Events newer
+    than `lag` seconds are left for the next run so slow-committing inserts are
+    not skipped. The watermark is advanced with a compare-and-set in the same
+    transaction as the rollup rows, so overlapping runs never count an event
+    twice. Returns the number of events rolled up.
+    """
+    batch_size = batch_size or Config.STUDY_ROLLUP_BATCH_SIZE
+    lag = Config.STUDY_ROLLUP_LAG if lag is None else lag
+    cutoff = datetime.utcnow() - timedelta(seconds=lag)
+    
+    ensure_rollup_state()
+    
+    total = 0
+    while True:
+        watermark = db.session.query(RollupState.last_event_id).filter(
+            RollupState.name == ROLLUP_NAME
+        ).scalar() or 0
+        
+        # Derived table rather than IN (... LIMIT), which MySQL rejects
+        window = db.session.query(StudySession.id, StudySession.created_at).filter(
+            StudySession.id > watermark
+        ).order_by(StudySession.id).limit(batch_size).subquery()
+        upper = db.session.query(db.func.max(window.c.id)).filter(
+            window.c.created_at <= cutoff
+        ).scalar()
+        if upper is None:
+            break
+        
+        day = db.func.date(StudySession.created_at)
+        groups = db.session.query(
+            StudySession.user_id,
+            StudySession.flashcard_id,
+            day,
+            db.func.count(StudySession.id),
+            db.func.coalesce(db.func.sum(db.case((StudySession.is_correct == True, 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(StudySession.time_spent), 0)
+        ).filter(
+            StudySession.id > watermark,
+            StudySession.id <= upper
+        ).group_by(StudySession.user_id, StudySession.flashcard_id, day).all()
+        
+        card_rows = []
+        user_totals = defaultdict(lambda: [0, 0, 0])
+        events = 0
+        for user_id, flashcard_id, event_day, attempts, correct, time_spent in groups:
+            event_day = _as_date(event_day)
+            card_rows.append({
+                'flashcard_id': flashcard_id,
+                'day': event_day,
+                'user_id': user_id,
+                'attempts': int(attempts),
+                'correct': int(correct),
+                'time_spent': int(time_spent)
+            })
+            user_total = user_totals[(user_id, event_day)]
+            user_total[0] += int(attempts)
+            user_total[1] += int(correct)
+            user_total[2] += int(time_spent)
+            events += int(attempts)
+        
+        user_rows = [
+            {'user_id': user_id, 'day': event_day, 'attempts': attempts, 'correct': correct, 'time_spent': time_spent}
+            for (user_id, event_day), (attempts, correct, time_spent) in user_totals.items()
+        ]
+        
+        try:
+            claimed = RollupState.query.filter(
+                RollupState.name == ROLLUP_NAME,
+                RollupState.last_event_id == watermark
+            ).update({'last_event_id': upper, 'updated_at': datetime.utcnow()}, synchronize_session=False)
+            if not claimed:
+                db.session.rollback()
+                # Another rollup got there first, unless the watermark row is gone
+                if db.session.get(RollupState, ROLLUP_NAME) is None:
+                    raise RuntimeError(f"Rollup state '{ROLLUP_NAME}' disappeared; not restarting from event 0")
+                continue
+            
+            upsert_increment(CardDailyStat, card_rows, ['flashcard_id', 'day'], ['attempts', 'correct', 'time_spent'])
+            upsert_increment(UserDailyStat, user_rows, ['user_id', 'day'], ['attempts', 'correct', 'time_spent'])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        total += events
+    
+    return total
+
+def get_study_stats(user_id, days=30, flashcard_id=None):
+    """
+    Daily study stats for a user (or one of their cards), read from the rollups
+    """
+    days = max(1, min(days, Config.STUDY_STATS_MAX_DAYS))
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    
+    if flashcard_id is None:
+        model = UserDailyStat
+        query = UserDailyStat.query.filter(UserDailyStat.user_id == user_id)
+    else:
+        model = CardDailyStat
+        query = CardDailyStat.query.filter(
+            CardDailyStat.user_id == user_id,
+            CardDailyStat.flashcard_id == flashcard_id
+        )
+    
+    rows = query.filter(model.day >= since).order_by(model.day.asc()).all()
+    
+    daily = [{
+        'day': row.day.isoformat(),
+        'attempts': row.attempts,
+        'correct': row.correct,
+        'accuracy': round(row.correct / row.attempts, 3) if row.attempts else 0,
+        'time_spent_ms': row.time_spent
+    } for row in rows]
+    
+    attempts = sum(row.attempts for row in rows)
+    correct = sum(row.correct for row in rows)
+    return {
+        'since': since.isoformat(),
+        'days': daily,
+        'totals': {
+            'attempts': attempts,
+            'correct': correct,
+            'accuracy': round(correct / attempts, 3) if attempts else 0,
+            'time_spent_ms': sum(row.time_spent for row in rows),
+            'active_days': len(rows)
+        }
+    }
+
+def run_rollup_worker(app, interval=None, stop_event=None):
+    """Roll up study events every `interval` seconds until stop_event is set"""
+    interval = interval or Config.STUDY_ROLLUP_INTERVAL
+    
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                rollup_study_events()
+            except Exception as e:
+                print(f"Study rollup failed: {e}")
+            finally:
+                db.session.remove()
+
+def start_rollup_worker(app):
+    """Run the study rollup from a daemon thread, unless STUDY_ROLLUP_INPROCESS_WORKER is off"""
+    global _rollup_thread
+    
+    interval = app.config.get('STUDY_ROLLUP_INTERVAL', 0)
+    if not app.config.get('STUDY_ROLLUP_INPROCESS_WORKER') or interval <= 0:
+        return None
+    
+    with _rollup_lock:
+        if _rollup_thread is None or not _rollup_thread.is_alive():
+            _rollup_thread = threading.Thread(target=run_rollup_worker, args=(app, interval), name='study-rollup', daemon=True)
+            _rollup_thread.start()
+        return _rollup_thread
+
+@click.group('study')
+def study_cli():
+    """Study event log maintenance."""
+
+@study_cli.command('rollup')
+@click.option('--batch-size', type=int, default=None, help='Events per transaction (defaults to STUDY_ROLLUP_BATCH_SIZE).')
+@click.option('--lag', type=float, default=None, help='Skip events newer than this many seconds (defaults to STUDY_ROLLUP_LAG).')
+@with_appcontext
+def rollup_command(batch_size, lag):
+    """Fold new study events into the daily stats tables."""
+    rolled = rollup_study_events(batch_size=batch_size, lag=lag)
+    click.echo(f"Rolled up {rolled} study events")
+
+@study_cli.command('worker')
+@click.option('--interval', type=float, default=None, help='Seconds between rollups (defaults to STUDY_ROLLUP_INTERVAL).')
+@with_appcontext
+def worker_command(interval):
+    """Run a worker that keeps the daily stats rolled up."""
+    from flask import current_app
+    
+    interval = interval or Config.STUDY_ROLLUP_INTERVAL
+    if interval <= 0:
+        raise click.ClickException("Set STUDY_ROLLUP_INTERVAL or --interval to a positive number of seconds")
+    click.echo('Study rollup worker started')
+    run_rollup_worker(current_app._get_current_object(), interval=interval)